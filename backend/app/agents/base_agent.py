@@ -1,5 +1,16 @@
+import asyncio
+
+
 class BaseAgent:
     name: str = "base"
 
     def run(self, payload: dict) -> dict:
         raise NotImplementedError
+
+    async def arun(self, payload: dict) -> dict:
+        """Async entry point; agents without async I/O run ``run`` in a worker thread."""
+        return await asyncio.to_thread(self.run, payload)
+
+    def fallback(self, payload: dict, reason: str) -> dict:
+        """Offline payload (no upstream or LLM calls) used when ``run`` cannot finish in time."""
+        raise NotImplementedError
@@ -1,9 +1,15 @@
 from app.agents.base_agent import BaseAgent
 from app.core.llm_provider import get_llm
 from app.data.showcase_cases import resolve_showcase_case
-from app.services.clinicaltrials_service import fetch_trials
+from app.services.clinicaltrials_service import afetch_trials, iter_trials
 from app.utils.summarizer import summarize_with_llm
+import asyncio
 import json
+from typing import Iterable
+
+# Trials the agent scores, as before the v2 migration; one page per request.
+# Bulk sweeps use iter_trials with their own limit.
+MAX_API_TRIALS = 15
 
 
 class ClinicalAgent(BaseAgent):
@@ -12,14 +18,25 @@ class ClinicalAgent(BaseAgent):
     def run(self, payload: dict) -> dict:
         molecule = payload.get("molecule")
         disease = payload.get("disease")
+        return self._analyze(molecule, disease, iter_trials(molecule, disease, limit=MAX_API_TRIALS))
+
+    async def arun(self, payload: dict) -> dict:
+        molecule = payload.get("molecule")
+        disease = payload.get("disease")
+        api_trials = await afetch_trials(molecule, disease, limit=MAX_API_TRIALS)
+        return await asyncio.to_thread(self._analyze, molecule, disease, api_trials)
 
+    def fallback(self, payload: dict, reason: str) -> dict:
+        return self._synthetic_payload(payload.get("molecule"), payload.get("disease"), reason)
+
+    def _analyze(self, molecule: str | None, disease: str | None, api_trials: Iterable[dict]) -> dict:
         showcase = resolve_showcase_case(molecule)
-        api_trials = fetch_trials(molecule, disease)
         if showcase:
             return self._showcase_payload(molecule, disease, showcase, api_trials)
 
-        if api_trials:
-            return self._from_api_trials(molecule, disease, api_trials)
+        payload = self._from_api_trials(molecule, disease, api_trials)
+        if payload:
+            return payload
 
         llm = get_llm()
         if not llm:
@@ -85,7 +102,7 @@ Return STRICT JSON ONLY in this schema:
         except Exception:
             return self._synthetic_payload(molecule, disease, "LLM parsing failure")
 
-    def _showcase_payload(self, molecule: str | None, disease: str | None, case: dict, api_trials: list[dict]):
+    def _showcase_payload(self, molecule: str | None, disease: str | None, case: dict, api_trials: Iterable[dict]):
         curated = [self._normalize_trial_entry(entry) for entry in case.get("curated_trials", [])]
         api_entries = [
             self._normalize_api_trial_entry(entry, molecule, disease)
@@ -164,7 +181,7 @@ Return STRICT JSON ONLY in this schema:
         }
         return record
 
-    def _dedupe_trial_entries(self, entries: list[dict]):
+    def _dedupe_trial_entries(self, entries: Iterable[dict]):
         seen = set()
         result = []
         for entry in entries:
@@ -263,12 +280,15 @@ Return STRICT JSON ONLY in this schema:
         )
         return payload
 
-    def _from_api_trials(self, molecule: str | None, disease: str | None, trials: list[dict]):
-        records = [
+    def _from_api_trials(self, molecule: str | None, disease: str | None, trials: Iterable[dict]):
+        """Normalize registry entries as they stream in; None when the registry had none."""
+        records = self._dedupe_trial_entries(
             self._normalize_api_trial_entry(entry, molecule, disease)
             for entry in trials
-        ]
-        records = [record for record in records if record]
+        )
+        if not records:
+            return None
+
         successful, failed, inconclusive = self._segment_trials(records)
 
         total = len(records)
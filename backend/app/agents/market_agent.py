@@ -18,15 +18,8 @@ class MarketAgent(BaseAgent):
         molecule = payload.get("molecule")
         showcase = resolve_showcase_case(molecule)
 
-        disease_l = disease.lower()
-
         # -------- BASE MARKET SIGNAL (NO LLM) --------
-        if disease_l in BLOCKBUSTER_DISEASES:
-            base_feasibility = 0.4
-            base_summary = "Large but saturated market with intense competition."
-        else:
-            base_feasibility = 0.8
-            base_summary = "Emerging or niche market with potential unmet need."
+        base_summary, base_feasibility = self._base_signal(disease)
 
         if showcase:
             curated = self._showcase_market_case(molecule, disease, showcase)
@@ -90,6 +83,15 @@ Return STRICT JSON ONLY:
             "sources": []
         }
 
+    def fallback(self, payload: dict, reason: str) -> dict:
+        disease = payload.get("disease", "Unknown")
+        return self._heuristic_response(disease, *self._base_signal(disease))
+
+    def _base_signal(self, disease: str) -> tuple[str, float]:
+        if disease.lower() in BLOCKBUSTER_DISEASES:
+            return "Large but saturated market with intense competition.", 0.4
+        return "Emerging or niche market with potential unmet need.", 0.8
+
     def _heuristic_response(self, disease, summary, feasibility):
         summary_text = summarize_with_llm(
             f"{disease} market outlook",
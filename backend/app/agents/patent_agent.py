@@ -1,10 +1,13 @@
 from app.agents.base_agent import BaseAgent
 from app.core.llm_provider import get_llm
 from app.data.showcase_cases import resolve_showcase_case
-from app.services.patent_service import fetch_patents
+from app.services.patent_service import afetch_patents, fetch_patents
 from app.utils.summarizer import summarize_with_llm
+import asyncio
 import json
 
+# Patents the agent reports on; bulk sweeps use iter_patents directly.
+MAX_API_PATENTS = 10
 
 GENERIC_MOLECULES = {
     "aspirin",
@@ -32,8 +35,23 @@ class PatentAgent(BaseAgent):
         if not molecule:
             return self._class_based(disease)
 
+        return self._analyze(molecule, disease, fetch_patents(molecule, limit=MAX_API_PATENTS))
+
+    async def arun(self, payload: dict) -> dict:
+        molecule = payload.get("molecule")
+        disease = payload.get("disease")
+
+        if not molecule:
+            return await asyncio.to_thread(self._class_based, disease)
+
+        api_patents = await afetch_patents(molecule, limit=MAX_API_PATENTS)
+        return await asyncio.to_thread(self._analyze, molecule, disease, api_patents)
+
+    def fallback(self, payload: dict, reason: str) -> dict:
+        return self._heuristic_case(payload.get("molecule"), payload.get("disease"), reason)
+
+    def _analyze(self, molecule: str, disease: str | None, api_patents: list[dict]) -> dict:
         showcase = resolve_showcase_case(molecule)
-        api_patents = fetch_patents(molecule, limit=10)
         if showcase:
             return self._showcase_case(molecule, disease, showcase, api_patents)
 
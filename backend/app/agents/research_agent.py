@@ -1,18 +1,16 @@
+import asyncio
 import re
-import xml.etree.ElementTree as ET
+from contextlib import aclosing, closing
 from datetime import datetime
 
-import requests
-
 from app.agents.base_agent import BaseAgent
 from app.data.showcase_cases import resolve_showcase_case
+from app.services.pubmed_service import aiter_articles, iter_articles
 from app.utils.summarizer import summarize_with_llm
 
-PUBMED_SEARCH = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
-PUBMED_FETCH = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
-
-MAX_PUBMED_IDS = 5
-PUBMED_TIMEOUT = 5
+# The scan stops at this many records even if the evidence quotas are not
+# both met, which keeps it to a single efetch page.
+MAX_PUBMED_ARTICLES = 100
 MAX_POSITIVE = 5
 MAX_NEGATIVE = 3
 
@@ -43,43 +41,67 @@ class ResearchAgent(BaseAgent):
         if showcase:
             return self._showcase_payload(molecule, showcase)
 
-        ids = self._fetch_pubmed_ids(molecule)
-        if not ids:
-            return self._synthetic_payload(molecule, "No PubMed matches detected")
-
-        positive, negative = [], []
+        positive, negative, scanned = [], [], 0
+        articles = iter_articles(molecule, max_results=MAX_PUBMED_ARTICLES, page_size=MAX_PUBMED_ARTICLES)
+        with closing(articles):
+            for article in articles:
+                scanned += 1
+                if self._add_evidence(article, positive, negative):
+                    break
 
-        for pmid in ids:
-            article = self._fetch_pubmed_article(pmid)
-            if not article:
-                continue
+        return self._evidence_payload(molecule, positive, negative, scanned)
 
-            title = article["title"]
-            abstract = article["abstract"]
-            journal = article["journal"]
-            year = article["year"]
+    async def arun(self, state: dict) -> dict:
+        molecule = state.get("molecule")
+        if not molecule:
+            return self._empty()
 
-            disease = self.extract_disease(title + " " + abstract)
-            if disease == "Unknown":
-                continue
+        showcase = resolve_showcase_case(molecule)
+        if showcase:
+            return await asyncio.to_thread(self._showcase_payload, molecule, showcase)
+
+        positive, negative, scanned = [], [], 0
+        articles = aiter_articles(molecule, max_results=MAX_PUBMED_ARTICLES, page_size=MAX_PUBMED_ARTICLES)
+        async with aclosing(articles):
+            async for article in articles:
+                scanned += 1
+                if self._add_evidence(article, positive, negative):
+                    break
+
+        return await asyncio.to_thread(self._evidence_payload, molecule, positive, negative, scanned)
+
+    def fallback(self, payload: dict, reason: str) -> dict:
+        return self._synthetic_payload(payload.get("molecule"), reason)
+
+    def _add_evidence(self, article: dict, positive: list, negative: list) -> bool:
+        """File one article as positive/negative evidence; True once both quotas are met."""
+        title = article["title"]
+        abstract = article["abstract"]
+
+        disease = self.extract_disease(title + " " + abstract)
+        if disease == "Unknown":
+            return False
+
+        record = {
+            "disease": disease,
+            "title": title,
+            "journal": article["journal"],
+            "year": article["year"],
+            "url": f"https://pubmed.ncbi.nlm.nih.gov/{article['pmid']}"
+        }
 
-            record = {
-                "disease": disease,
-                "title": title,
-                "journal": journal,
-                "year": year,
-                "url": f"https://pubmed.ncbi.nlm.nih.gov/{pmid}"
-            }
+        if re.search(r"no significant|failed|did not improve", abstract.lower()):
+            record["reason"] = "No statistically significant improvement"
+            negative.append(record)
+        else:
+            record["evidence_type"] = "Experimental / Observational study"
+            positive.append(record)
 
-            if re.search(r"no significant|failed|did not improve", abstract.lower()):
-                record["reason"] = "No statistically significant improvement"
-                negative.append(record)
-            else:
-                record["evidence_type"] = "Experimental / Observational study"
-                positive.append(record)
+        return len(positive) >= MAX_POSITIVE and len(negative) >= MAX_NEGATIVE
 
-            if len(positive) >= MAX_POSITIVE and len(negative) >= MAX_NEGATIVE:
-                break
+    def _evidence_payload(self, molecule: str, positive: list, negative: list, scanned: int) -> dict:
+        if not scanned:
+            return self._synthetic_payload(molecule, "No PubMed matches detected")
 
         if not positive and not negative:
             return self._synthetic_payload(molecule, "Filtered literature returned no actionable evidence")
@@ -121,58 +143,6 @@ class ResearchAgent(BaseAgent):
             }
         }
 
-    def _fetch_pubmed_ids(self, molecule: str) -> list[str]:
-        try:
-            current_year = datetime.utcnow().year
-            params = {
-                "db": "pubmed",
-                "term": molecule,
-                "retmax": MAX_PUBMED_IDS,
-                "retmode": "json",
-                "datetype": "pdat",
-                "mindate": current_year - 25,
-                "maxdate": current_year
-            }
-            res = requests.get(
-                PUBMED_SEARCH,
-                params=params,
-                timeout=PUBMED_TIMEOUT
-            )
-            res.raise_for_status()
-            ids = res.json().get("esearchresult", {}).get("idlist", [])
-            return ids[:MAX_PUBMED_IDS]
-        except Exception:
-            return []
-
-    def _fetch_pubmed_article(self, pmid: str):
-        try:
-            response = requests.get(
-                PUBMED_FETCH,
-                params={"db": "pubmed", "id": pmid, "retmode": "xml"},
-                timeout=PUBMED_TIMEOUT
-            )
-            response.raise_for_status()
-            root = ET.fromstring(response.text)
-            article = root.find(".//Article")
-            if article is None:
-                return None
-
-            title = article.findtext("ArticleTitle", "")
-            abstract = " ".join([
-                a.text or "" for a in article.findall(".//AbstractText")
-            ])
-            journal = article.findtext(".//Journal/Title", "")
-            year = article.findtext(".//PubDate/Year")
-            year_value = int(year) if year and year.isdigit() else None
-            return {
-                "title": title,
-                "abstract": abstract,
-                "journal": journal,
-                "year": year_value
-            }
-        except Exception:
-            return None
-
     def _showcase_payload(self, molecule: str, case: dict) -> dict:
         evidence_entries = case.get("curated_evidence", [])
         if not evidence_entries:
@@ -0,0 +1,253 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from datetime import datetime
+
+from app.controllers.repurpose_controller import (
+    BATCH_CONCURRENCY,
+    GRAPH_FAILURE_DETAIL,
+    build_response,
+    run_batch,
+    stream_analysis,
+)
+from app.db.redis_cache import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+JOB_BACKEND = os.getenv("JOB_BACKEND", "memory")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "86400"))
+
+QUEUED, RUNNING, COMPLETED, FAILED = "queued", "running", "completed", "failed"
+ANALYSIS, BATCH = "analysis", "batch"
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+class InMemoryJobBackend:
+    """Job records and queue held in this process; jobs are lost on restart."""
+
+    def __init__(self):
+        self._jobs: dict = {}
+        self._queue = None
+
+    def _pending(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+
+    async def enqueue(self, job: dict):
+        await self.save(job)
+        await self._pending().put(job["id"])
+
+    async def dequeue(self, timeout: float) -> str | None:
+        try:
+            return await asyncio.wait_for(self._pending().get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def get(self, job_id: str) -> dict | None:
+        job = self._jobs.get(job_id)
+        return json.loads(json.dumps(job, default=str)) if job else None
+
+    async def save(self, job: dict):
+        self._jobs[job["id"]] = json.loads(json.dumps(job, default=str))
+
+
+class RedisJobBackend:
+    """Job records as JSON strings with a TTL plus a Redis list as the queue.
+
+    Any process pointed at the same Redis can enqueue jobs, serve status reads
+    or run workers, so the worker pool scales independently of the API.
+    """
+
+    QUEUE_KEY = "jobs:queue"
+
+    def __init__(self, ttl_seconds: int = JOB_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+
+    def _key(self, job_id: str) -> str:
+        return f"jobs:{job_id}"
+
+    async def enqueue(self, job: dict):
+        await self.save(job)
+        await get_async_redis().rpush(self.QUEUE_KEY, job["id"])
+
+    async def dequeue(self, timeout: float) -> str | None:
+        item = await get_async_redis().blpop([self.QUEUE_KEY], timeout=timeout)
+        if not item:
+            return None
+        _, job_id = item
+        return job_id.decode() if isinstance(job_id, bytes) else job_id
+
+    async def get(self, job_id: str) -> dict | None:
+        raw = await get_async_redis().get(self._key(job_id))
+        return json.loads(raw) if raw else None
+
+    async def save(self, job: dict):
+        await get_async_redis().set(
+            self._key(job["id"]),
+            json.dumps(job, default=str),
+            ex=self.ttl_seconds
+        )
+
+
+JOB_BACKENDS = {
+    "memory": InMemoryJobBackend,
+    "redis": RedisJobBackend,
+}
+
+_backend = None
+
+
+def get_job_backend():
+    global _backend
+
+    if _backend is None:
+        backend_cls = JOB_BACKENDS.get(JOB_BACKEND)
+        if backend_cls is None:
+            raise ValueError(f"Unknown JOB_BACKEND {JOB_BACKEND!r}")
+        _backend = backend_cls()
+    return _backend
+
+
+def new_job(kind: str, analyses: list[tuple], rejected: list[dict] | None = None) -> dict:
+    """Build a queued job record.
+
+    ``analyses`` are validated ``(case_type, case_probe, budget_ms, index)``
+    entries, ``index`` being the item's position in the submitted request;
+    ``rejected`` holds per-item validation errors that are reported as results
+    straight away. An ANALYSIS job streams node outputs into ``nodes`` and
+    ends with ``result``; a BATCH job collects one entry per item in ``results``.
+    """
+    rejected = rejected or []
+    return {
+        "id": uuid.uuid4().hex,
+        "status": QUEUED,
+        "kind": kind,
+        "created_at": _now(),
+        "started_at": None,
+        "finished_at": None,
+        "analyses": [list(entry) for entry in analyses],
+        "total": len(analyses) + len(rejected),
+        "completed": len(rejected),
+        "nodes": {},
+        "result": None,
+        "results": list(rejected),
+        "error": None
+    }
+
+
+async def submit_job(kind: str, analyses: list[tuple], rejected: list[dict] | None = None) -> dict:
+    job = new_job(kind, analyses, rejected)
+    if not analyses:
+        job.update(status=COMPLETED, finished_at=_now())
+        await get_job_backend().save(job)
+    else:
+        await get_job_backend().enqueue(job)
+    return job
+
+
+async def _run_single(job: dict, backend):
+    case_type, case_probe, budget_ms, _ = job["analyses"][0]
+    async for node, values in stream_analysis(case_type, case_probe, budget_ms):
+        if node is None:
+            job["result"] = build_response(case_type, case_probe, values)
+        else:
+            job["nodes"][node] = values
+        await backend.save(job)
+    job["completed"] = 1
+
+
+async def _run_batch(job: dict, backend):
+    analyses = [tuple(entry[:3]) for entry in job["analyses"]]
+    indexes = [entry[3] for entry in job["analyses"]]
+    async for group, state, error in run_batch(analyses, BATCH_CONCURRENCY):
+        for position in group:
+            case_type, case_probe, _ = analyses[position]
+            if error is not None:
+                line = {"index": indexes[position], "status": "error", "detail": GRAPH_FAILURE_DETAIL}
+            else:
+                line = {
+                    "index": indexes[position],
+                    "status": "ok",
+                    "result": build_response(case_type, case_probe, state)
+                }
+            job["results"].append(line)
+            job["completed"] += 1
+        await backend.save(job)
+
+
+async def process_job(job_id: str, backend=None):
+    backend = backend or get_job_backend()
+    job = await backend.get(job_id)
+    if job is None:
+        return
+
+    job.update(status=RUNNING, started_at=_now())
+    await backend.save(job)
+    try:
+        if job["kind"] == ANALYSIS:
+            await _run_single(job, backend)
+        else:
+            await _run_batch(job, backend)
+        job["status"] = COMPLETED
+    except Exception:
+        job.update(status=FAILED, error=GRAPH_FAILURE_DETAIL)
+    job["finished_at"] = _now()
+    await backend.save(job)
+
+
+async def mark_failed(job_id: str, backend):
+    """Best-effort: record a job as failed so it does not stay ``running`` forever."""
+    try:
+        job = await backend.get(job_id)
+        if job is None or job["status"] in {COMPLETED, FAILED}:
+            return
+        job.update(status=FAILED, error=GRAPH_FAILURE_DETAIL, finished_at=_now())
+        await backend.save(job)
+    except Exception:
+        logger.warning("Could not mark job %s as failed", job_id)
+
+
+class JobWorkerPool:
+    """A fixed number of asyncio workers draining the job backend's queue."""
+
+    def __init__(self, backend=None, workers: int = JOB_WORKERS, poll_timeout: float = 1.0):
+        self.backend = backend or get_job_backend()
+        self.workers = workers
+        self.poll_timeout = poll_timeout
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self):
+        self._tasks = [
+            asyncio.create_task(self._work(), name=f"job-worker-{index}")
+            for index in range(self.workers)
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _work(self):
+        while True:
+            try:
+                job_id = await self.backend.dequeue(self.poll_timeout)
+            except Exception:
+                # Backend unreachable (e.g. Redis restarting); back off and retry.
+                await asyncio.sleep(self.poll_timeout)
+                continue
+            if not job_id:
+                continue
+            try:
+                await process_job(job_id, self.backend)
+            except Exception:
+                # The backend failed mid-job; keep the worker alive for the next one.
+                logger.exception("Job %s could not be processed", job_id)
+                await mark_failed(job_id, self.backend)
@@ -0,0 +1,361 @@
+import asyncio
+import json
+import os
+import time
+from contextlib import nullcontext
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+
+from app.core.decision_layer import detect_case
+from app.core.llm_provider import llm_cache_bypassed
+from app.core.llm_usage import metering_llm_usage
+from app.data.showcase_cases import resolve_showcase_name
+from app.db.redis_cache import aclaim, acache_load, acache_store, arelease
+from app.graph.budget import budget_input
+from app.graph.registry import get_graph
+from app.schemas.request_schema import RepurposeRequest
+from app.utils.summarizer import collecting_summaries
+
+UNSUPPORTED_CASE_MESSAGES = {
+    "CASE_2_DISEASE_ONLY": "Disease-only workflows are not supported yet.",
+    "CASE_4_TRENDS": "Trend and intelligence mode is not available yet."
+}
+
+GRAPH_FAILURE_DETAIL = "Failed to orchestrate the agent graph."
+NO_CACHE_UNSUPPORTED_DETAIL = "no_cache is only supported on /repurpose and /repurpose/stream."
+
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+MAX_BATCH_ITEMS = 5000
+
+# Finished /repurpose results are served from Redis for RESPONSE_CACHE_FRESH_SECONDS,
+# then for RESPONSE_CACHE_STALE_SECONDS more while a background run refreshes them.
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE", "true").lower() in {"1", "true", "yes"}
+RESPONSE_CACHE_FRESH_SECONDS = int(os.getenv("RESPONSE_CACHE_FRESH_SECONDS", "3600"))
+RESPONSE_CACHE_STALE_SECONDS = int(os.getenv("RESPONSE_CACHE_STALE_SECONDS", "86400"))
+RESPONSE_REFRESH_LOCK_SECONDS = 120
+
+# Graph state that only means something inside the run that produced it; a
+# cached response made no LLM calls of its own.
+TRANSIENT_STATE_KEYS = {"budget_ms", "deadline", "llm_usage"}
+
+
+class SingleFlight:
+    """Share one in-flight coroutine between concurrent callers with the same key.
+
+    The first caller starts the work; callers arriving before it finishes await
+    the same task and receive its result (or exception). The task is shielded so
+    a disconnecting caller does not cancel the run for everybody else; it is
+    cancelled only once every caller waiting on it has gone.
+    """
+
+    def __init__(self):
+        self._inflight: dict = {}
+        self._waiters: dict = {}
+
+    async def do(self, key, func) -> tuple:
+        """Return ``(result, shared)`` where ``shared`` is True for followers."""
+        task = self._inflight.get(key)
+        shared = task is not None
+        if not shared:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task), shared
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done():
+                    task.cancel()
+                    self._forget(key, task)
+
+    def _forget(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+
+_analyses = SingleFlight()
+
+
+def resolve_case(payload: RepurposeRequest) -> tuple[str, dict]:
+    """Validate the request and return its case type plus normalized graph input."""
+    molecule = (payload.molecule or "").strip()
+    disease = (payload.disease or "").strip() or None
+
+    if not molecule:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Please provide a molecule or drug name to run the analysis."
+        )
+
+    case_probe = {
+        "molecule": molecule,
+        "disease": disease,
+        "trend_mode": payload.trend_mode
+    }
+
+    try:
+        case_type = detect_case(case_probe)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(exc)
+        ) from exc
+
+    if case_type in UNSUPPORTED_CASE_MESSAGES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=UNSUPPORTED_CASE_MESSAGES[case_type]
+        )
+
+    return case_type, case_probe
+
+
+def resolve_batch_item(item) -> tuple[str, dict, int | None]:
+    """Validate one raw batch item into ``(case_type, case_probe, budget_ms)``.
+
+    Raises ``HTTPException`` for this item alone, so one bad entry does not
+    reject the rest of the batch.
+    """
+    try:
+        payload = RepurposeRequest.model_validate(item)
+    except ValidationError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=exc.errors(include_url=False, include_context=False, include_input=False)
+        ) from exc
+
+    if payload.no_cache:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=NO_CACHE_UNSUPPORTED_DETAIL
+        )
+
+    case_type, case_probe = resolve_case(payload)
+    return case_type, case_probe, payload.budget_ms
+
+
+def build_response(
+    case_type: str,
+    case_probe: dict,
+    state: dict,
+    coalesced: bool = False,
+    cache: str = "recomputed",
+    generated_at: str | None = None
+) -> dict:
+    timestamp = generated_at or datetime.utcnow().isoformat() + "Z"
+
+    return {
+        "query_metadata": {
+            "case_type": case_type,
+            "input": case_probe,
+            "generated_at": timestamp,
+            "budget_ms": state.get("budget_ms"),
+            "degraded_nodes": state.get("degraded_nodes", []),
+            "coalesced": coalesced,
+            "cache": cache,
+            "llm_usage": state.get("llm_usage")
+        },
+        "agents": {
+            "research": state.get("research", {}),
+            "clinical_trials": state.get("clinical_trials", {}),
+            "patents": state.get("patents", {}),
+            "market": state.get("market", {})
+        },
+        "scoring_engine": state.get("scoring_engine", {}),
+        "final_verdict": state.get("final_verdict", {}),
+        "export": {
+            "pdf_available": False,
+            "pdf_url": None
+        }
+    }
+
+
+def _normalize(value: str | None) -> str | None:
+    return " ".join(value.split()).casefold() if value else None
+
+
+def analysis_key(case_type: str, case_probe: dict, budget_ms: int | None) -> tuple:
+    """Requests with equal keys produce the same graph run and may share it.
+
+    Showcase aliases (e.g. "acetylsalicylic acid") resolve to their canonical
+    molecule because every agent reads the same curated case for them.
+    """
+    molecule = case_probe.get("molecule")
+    return (
+        case_type,
+        resolve_showcase_name(molecule) or _normalize(molecule),
+        _normalize(case_probe.get("disease")),
+        budget_ms
+    )
+
+
+async def run_analysis(
+    case_type: str,
+    case_probe: dict,
+    budget_ms: int | None = None,
+    no_cache: bool = False
+) -> tuple[dict, bool]:
+    """Run the case graph, coalescing identical concurrent requests.
+
+    With ``no_cache`` the run skips the LLM completion cache, and it only
+    shares a run with other ``no_cache`` requests. Returns the final graph
+    state and whether it came from another request's run.
+    """
+    graph = get_graph(case_type)
+    key = analysis_key(case_type, case_probe, budget_ms)
+    return await _analyses.do(
+        (*key, "no_cache") if no_cache else key,
+        lambda: _invoke_graph(graph, {**case_probe, **budget_input(budget_ms)}, no_cache)
+    )
+
+
+async def _invoke_graph(graph, graph_input: dict, no_cache: bool = False) -> dict:
+    # Agents hand their summaries to the collector instead of waiting on each
+    # one, so the summary calls overlap with each other and the rest of the graph.
+    with llm_cache_bypassed() if no_cache else nullcontext():
+        async with metering_llm_usage() as usage, collecting_summaries() as summaries:
+            state = await graph.ainvoke(graph_input)
+            deadline = graph_input.get("deadline")
+            timeout = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+            state = await summaries.resolve(state, timeout)
+    # A node whose summary missed the deadline kept its offline text, so the
+    # run is as partial as one where the node itself fell back.
+    degraded = list(state.get("degraded_nodes", []))
+    degraded += [node for node in summaries.timed_out_nodes if node not in degraded]
+    return {**state, "degraded_nodes": degraded, "llm_usage": usage.snapshot()}
+
+
+def response_cache_key(case_type: str, case_probe: dict) -> str:
+    # The budget only decides how long a run may take, not what a complete run returns.
+    return "response:" + json.dumps(analysis_key(case_type, case_probe, None)[:-1])
+
+
+async def _store_response(key: str, state: dict):
+    # A run that fell back somewhere is not worth serving to the next caller.
+    if state.get("degraded_nodes") or (state.get("llm_usage") or {}).get("refused_calls"):
+        return
+    entry = {
+        "state": {name: value for name, value in state.items() if name not in TRANSIENT_STATE_KEYS},
+        "computed_at": time.time(),
+        "generated_at": datetime.utcnow().isoformat() + "Z"
+    }
+    await acache_store("responses", key, entry, RESPONSE_CACHE_FRESH_SECONDS + RESPONSE_CACHE_STALE_SECONDS)
+
+
+_refreshes: set = set()
+
+
+async def _refresh_response(case_type: str, case_probe: dict, key: str):
+    # One worker refreshes an entry at a time; the others keep serving it stale.
+    claim = f"{key}:refresh"
+    if not await aclaim(claim, RESPONSE_REFRESH_LOCK_SECONDS):
+        return
+    try:
+        state, _ = await run_analysis(case_type, case_probe)
+        await _store_response(key, state)
+    finally:
+        await arelease(claim)
+
+
+def _refresh_in_background(case_type: str, case_probe: dict, key: str):
+    task = asyncio.ensure_future(_refresh_response(case_type, case_probe, key))
+    _refreshes.add(task)
+    # Retrieve the exception so a failed refresh is not reported as never retrieved.
+    task.add_done_callback(lambda done: _refreshes.discard(done) or done.cancelled() or done.exception())
+
+
+async def cached_analysis(
+    case_type: str,
+    case_probe: dict,
+    budget_ms: int | None = None,
+    no_cache: bool = False
+) -> tuple[dict, dict]:
+    """Serve the analysis from the response cache, running the graph on a miss.
+
+    Returns the state plus the ``build_response`` keyword arguments describing
+    where it came from: ``fresh`` and ``stale`` entries come from the cache
+    (a stale hit also starts a background refresh), ``recomputed`` means this
+    request ran (or shared) the graph. ``no_cache`` skips the read and
+    recomputes without cached LLM completions; the result is still stored.
+    """
+    key = response_cache_key(case_type, case_probe)
+    reads_cache = RESPONSE_CACHE_ENABLED and not no_cache
+    entry = await acache_load("responses", key) if reads_cache else None
+    if entry is not None:
+        fresh = time.time() - entry["computed_at"] < RESPONSE_CACHE_FRESH_SECONDS
+        if not fresh:
+            _refresh_in_background(case_type, case_probe, key)
+        # The cached state dropped the run's budget; report the one this request asked for.
+        return {**entry["state"], "budget_ms": budget_ms}, {
+            "cache": "fresh" if fresh else "stale",
+            "generated_at": entry["generated_at"]
+        }
+
+    state, coalesced = await run_analysis(case_type, case_probe, budget_ms, no_cache)
+    if RESPONSE_CACHE_ENABLED and not coalesced:
+        await _store_response(key, state)
+    return state, {"coalesced": coalesced}
+
+
+async def stream_analysis(case_type: str, case_probe: dict, budget_ms: int | None = None, no_cache: bool = False):
+    """Run the case graph yielding ``(node, update)`` as each node finishes.
+
+    The last item is ``(None, state)`` with the final graph state and the
+    run's ``llm_usage``. Streaming runs are not coalesced because every caller
+    wants its own node events. ``no_cache`` skips the LLM completion cache.
+    """
+    graph = get_graph(case_type)
+    state = dict(case_probe)
+
+    with llm_cache_bypassed() if no_cache else nullcontext():
+        async with metering_llm_usage() as usage:
+            async for mode, chunk in graph.astream(
+                {**case_probe, **budget_input(budget_ms)},
+                stream_mode=["updates", "values"]
+            ):
+                if mode == "values":
+                    state = chunk
+                    continue
+                for node, values in chunk.items():
+                    yield node, values or {}
+
+    yield None, {**state, "llm_usage": usage.snapshot()}
+
+
+async def run_batch(analyses: list[tuple[str, dict, int | None]], concurrency: int = BATCH_CONCURRENCY):
+    """Run many ``(case_type, case_probe, budget_ms)`` analyses, yielding as each finishes.
+
+    Entries with the same :func:`analysis_key` run once. Each yielded item is
+    ``(positions, state, error)`` where ``positions`` lists every input index
+    that shares the result. At most ``concurrency`` graphs run at a time.
+    """
+    groups: dict = {}
+    for position, (case_type, case_probe, budget_ms) in enumerate(analyses):
+        groups.setdefault(analysis_key(case_type, case_probe, budget_ms), []).append(position)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_group(positions: list[int]):
+        case_type, case_probe, budget_ms = analyses[positions[0]]
+        async with semaphore:
+            try:
+                state, _ = await run_analysis(case_type, case_probe, budget_ms)
+            except Exception as exc:
+                return positions, None, exc
+        return positions, state, None
+
+    tasks = [asyncio.ensure_future(run_group(positions)) for positions in groups.values()]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # The client may stop reading mid-batch. Cancelling a group detaches it
+        # from its shared run, which stops once no other request is waiting on it.
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,178 @@
+"""Deterministic local chat model for exercising the LLM code paths offline.
+
+Selected with ``LLM_PROVIDER=fake``. It recognises the prompts the agents
+send (clinical, patent, market, final verdict and summaries) and answers each
+with JSON in the schema the prompt asks for, derived only from the prompt so
+the same prompt always gets the same answer. Each call takes
+``FAKE_LLM_LATENCY_MS`` plus the completion's tokens at
+``FAKE_LLM_TOKENS_PER_SECOND``, like a hosted model would.
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+import zlib
+from typing import Any, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "200"))
+# 0 returns completions without the per-token delay.
+FAKE_LLM_TOKENS_PER_SECOND = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "250"))
+
+# Rough English average, good enough for simulated timing and token counts.
+CHARS_PER_TOKEN = 4
+
+
+def _field(prompt: str, name: str, default: str) -> str:
+    match = re.search(rf"^{name}:\s*(.+)$", prompt, re.MULTILINE)
+    value = match.group(1).strip() if match else ""
+    return default if not value or value == "None" else value
+
+
+def _pick(prompt: str, options: list):
+    return options[zlib.crc32(prompt.encode()) % len(options)]
+
+
+def _clinical(prompt: str) -> dict:
+    molecule = _field(prompt, "Molecule", "Candidate")
+    disease = _field(prompt, "Disease", "the target indication")
+    return {
+        "summary": f"{molecule} shows consistent Phase 2/3 signals in {disease}.",
+        "successful_trials": [
+            {
+                "disease": disease,
+                "trial_name": f"{molecule} efficacy study in {disease}",
+                "phase": "Phase 3",
+                "status": "Completed",
+                "evidence_note": "Met its primary endpoint versus placebo"
+            },
+            {
+                "disease": disease,
+                "trial_name": f"{molecule} dose-ranging study",
+                "phase": "Phase 2",
+                "status": _pick(prompt, ["Completed", "Ongoing"]),
+                "evidence_note": "Dose-dependent improvement in secondary endpoints"
+            }
+        ],
+        "failed_trials": [],
+        "inconclusive_trials": [],
+        "metrics": {"total_trials": 2, "success_rate": 1.0}
+    }
+
+
+def _patent(prompt: str) -> dict:
+    molecule = _field(prompt, "Molecule", "Candidate")
+    return {
+        "summary": f"Core composition patents on {molecule} have lapsed; method-of-use claims remain open.",
+        "patent_count": 3 + zlib.crc32(prompt.encode()) % 8,
+        "ip_risk_level": _pick(prompt, ["Low", "Moderate", "High"])
+    }
+
+
+def _market(prompt: str) -> dict:
+    return {
+        "adoption_trend": _pick(prompt, ["Low", "Moderate", "High"]),
+        "commercial_feasibility": round(0.3 + (zlib.crc32(prompt.encode()) % 60) / 100, 2),
+        "risks": ["Generic price erosion", "Payer pushback on label expansion"]
+    }
+
+
+def _verdict(prompt: str) -> dict:
+    return {
+        "decision": _pick(prompt, ["GO", "NO-GO"]),
+        "confidence": _pick(prompt, ["High", "Medium", "Low"]),
+        "executive_summary": "Evidence and IP position support a focused repurposing program.",
+        "primary_opportunity": "Lead indication from the research evidence",
+        "secondary_opportunities": ["Adjacent indication"],
+        "why_it_works": ["Established safety profile", "Mechanistic rationale"],
+        "risk_summary": ["Competitive landscape", "Trial cost"],
+        "recommended_next_steps": ["Design a Phase 2 proof-of-concept study"]
+    }
+
+
+def _summary(prompt: str) -> str:
+    topic = re.search(r"Summarize the findings for (.+?)\.", prompt)
+    facts = re.findall(r"^- (.+)$", prompt, re.MULTILINE)
+    lead = facts[0] if facts else "the available evidence"
+    return (
+        f"Findings for {topic.group(1) if topic else 'this topic'} are led by {lead}. "
+        f"{len(facts)} supporting data points were reviewed."
+    )
+
+
+# First matching marker wins; the markers are the role lines of the agents' prompts.
+RESPONDERS = [
+    ("clinical research expert", _clinical),
+    ("patent strategist", _patent),
+    ("market analyst", _market),
+    ("strategy expert", _verdict),
+]
+
+
+def complete(prompt: str) -> str:
+    for marker, responder in RESPONDERS:
+        if marker in prompt:
+            return json.dumps(responder(prompt))
+    return _summary(prompt)
+
+
+def count_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+class FakeChatModel(BaseChatModel):
+    model_name: str = "fake-llm"
+    temperature: float = 0
+    latency_ms: float = FAKE_LLM_LATENCY_MS
+    tokens_per_second: float = FAKE_LLM_TOKENS_PER_SECOND
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _respond(self, messages: List[BaseMessage]) -> tuple[ChatResult, float]:
+        prompt = "\n".join(str(message.content) for message in messages)
+        content = complete(prompt)
+        input_tokens, output_tokens = count_tokens(prompt), count_tokens(content)
+        delay = self.latency_ms / 1000
+        if self.tokens_per_second > 0:
+            delay += output_tokens / self.tokens_per_second
+
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens
+            },
+            response_metadata={"model_name": self.model_name}
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)]), delay
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        result, delay = self._respond(messages)
+        time.sleep(delay)
+        return result
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        result, delay = self._respond(messages)
+        await asyncio.sleep(delay)
+        return result
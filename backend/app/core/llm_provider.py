@@ -1,25 +1,243 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import json
+import time
+
+from langchain_core.load import dumpd
+from langchain_core.messages import AIMessage
 from langchain_groq import ChatGroq
 import os
+import xxhash
+
+from app.core.fake_llm import FakeChatModel
+from app.core.llm_usage import current_usage
+from app.db.redis_cache import acache_load, acache_store, cache_load, cache_store
+from app.utils.cancellation import cancelled, raise_if_cancelled
+from app.utils.cassettes import llm_client_options, replaying
+from app.utils.circuit_breaker import get_breaker, guarded
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT_SECONDS", "20"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "1"))
+
+# Completions are cached by (model, sampling params, prompt); every caller runs
+# at temperature 0, so a repeat prompt gets the same answer without a call.
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "true").lower() in {"1", "true", "yes"}
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 86400)))
 
 _cached_llm = None
+_llm_breaker = get_breaker(LLM_PROVIDER)
+_llm_suppressed = ContextVar("llm_suppressed", default=False)
+_llm_cache_bypassed = ContextVar("llm_cache_bypassed", default=False)
 
 
-def get_llm():
-    """Return a singleton ChatGroq client when an API key is available."""
-    global _cached_llm
+@contextmanager
+def llm_suppressed():
+    """Make get_llm() return None inside the block so callers take their non-LLM fallbacks."""
+    token = _llm_suppressed.set(True)
+    try:
+        yield
+    finally:
+        _llm_suppressed.reset(token)
+
+
+@contextmanager
+def llm_cache_bypassed():
+    """Skip completion cache reads inside the block; fresh answers are still stored."""
+    token = _llm_cache_bypassed.set(True)
+    try:
+        yield
+    finally:
+        _llm_cache_bypassed.reset(token)
+
+
+class GuardedLLM:
+    """Chat model proxy whose calls go through the provider's circuit breaker."""
+
+    def __init__(self, llm, breaker):
+        self._llm = llm
+        self._breaker = breaker
+
+    def invoke(self, *args, **kwargs):
+        raise_if_cancelled()
+        with guarded(self._breaker):
+            return self._llm.invoke(*args, **kwargs)
+
+    async def ainvoke(self, *args, **kwargs):
+        raise_if_cancelled()
+        with guarded(self._breaker):
+            return await self._llm.ainvoke(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._llm, name)
+
+
+class CachedLLM:
+    """Chat model proxy that serves repeat prompts from the completion cache.
+
+    Only the completion text is kept; a hit comes back as an ``AIMessage``
+    without touching the provider (or its circuit breaker).
+    """
+
+    def __init__(self, llm):
+        self._llm = llm
+
+    def cache_key(self, prompt, **kwargs) -> str:
+        text = prompt if isinstance(prompt, str) else json.dumps(dumpd(prompt), sort_keys=True)
+        params = {
+            "model": getattr(self._llm, "model_name", type(self._llm).__name__),
+            "temperature": getattr(self._llm, "temperature", None),
+            "max_tokens": getattr(self._llm, "max_tokens", None),
+            **kwargs
+        }
+        digest = xxhash.xxh3_128()
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+        digest.update(b"\n")
+        digest.update(text.encode())
+        return f"llm:{digest.hexdigest()}"
+
+    def _reads_cache(self) -> bool:
+        return LLM_CACHE_ENABLED and not _llm_cache_bypassed.get()
+
+    # Same signature as Runnable.invoke. ``config`` only carries callbacks and
+    # run metadata, so it stays out of the key; every other argument is keyed.
+    def invoke(self, prompt, config=None, **kwargs):
+        key = self.cache_key(prompt, **kwargs)
+        cached = cache_load("llm", key) if self._reads_cache() else None
+        if cached is not None:
+            return AIMessage(content=cached["content"], response_metadata={"cached": True})
+
+        response = self._llm.invoke(prompt, config, **kwargs)
+        if LLM_CACHE_ENABLED:
+            cache_store("llm", key, {"content": response.content}, LLM_CACHE_TTL)
+        return response
+
+    async def ainvoke(self, prompt, config=None, **kwargs):
+        key = self.cache_key(prompt, **kwargs)
+        cached = await acache_load("llm", key) if self._reads_cache() else None
+        if cached is not None:
+            return AIMessage(content=cached["content"], response_metadata={"cached": True})
+
+        response = await self._llm.ainvoke(prompt, config, **kwargs)
+        if LLM_CACHE_ENABLED:
+            await acache_store("llm", key, {"content": response.content}, LLM_CACHE_TTL)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._llm, name)
+
+
+def _token_counts(response) -> tuple[int, int]:
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+    return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
 
-    if _cached_llm is not None:
-        return _cached_llm
 
+class MeteredLLM:
+    """Chat model proxy that records each call in the request's :class:`LLMUsage`."""
+
+    def __init__(self, llm):
+        self._llm = llm
+
+    def _record(self, started: float, response=None):
+        usage = current_usage()
+        if usage is None:
+            return
+        prompt_tokens, completion_tokens = _token_counts(response) if response is not None else (0, 0)
+        usage.record(
+            getattr(self._llm, "model_name", type(self._llm).__name__),
+            prompt_tokens,
+            completion_tokens,
+            (time.perf_counter() - started) * 1000,
+            cached=bool(response is not None and response.response_metadata.get("cached")),
+            failed=response is None
+        )
+
+    def invoke(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self._llm.invoke(*args, **kwargs)
+        except Exception:
+            self._record(started)
+            raise
+        self._record(started, response)
+        return response
+
+    async def ainvoke(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self._llm.ainvoke(*args, **kwargs)
+        except Exception:
+            self._record(started)
+            raise
+        self._record(started, response)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._llm, name)
+
+
+def _groq_model():
     api_key = os.getenv("GROQ_API_KEY")
+    if not api_key and replaying():
+        # The replay stand-in does not authenticate.
+        api_key = "replay"
     if not api_key:
         return None
 
-    _cached_llm = ChatGroq(
+    return ChatGroq(
         groq_api_key=api_key,
         model_name="llama-3.1-70b-versatile",
-        temperature=0
+        temperature=0,
+        timeout=LLM_TIMEOUT,
+        max_retries=LLM_MAX_RETRIES,
+        **llm_client_options()
     )
 
-    return _cached_llm
 
+def _fake_model():
+    return FakeChatModel()
+
+
+# LLM_PROVIDER picks the chat model factory; each returns None when it cannot be built.
+LLM_PROVIDERS = {
+    "groq": _groq_model,
+    "fake": _fake_model,
+}
+
+# Fail at startup rather than with a KeyError on every get_llm() call.
+if LLM_PROVIDER not in LLM_PROVIDERS:
+    raise ValueError(f"Unknown LLM_PROVIDER {LLM_PROVIDER!r}; expected one of {', '.join(LLM_PROVIDERS)}")
+
+
+def get_llm():
+    """Return a singleton chat model for ``LLM_PROVIDER`` when it is available.
+
+    Groq needs an API key; ``fake`` is the local stand-in in
+    ``app/core/fake_llm.py``. Returns None while the provider's circuit
+    breaker is open, so callers take their non-LLM fallbacks without waiting
+    on a failing provider, once the request's LLM budget is spent, and in
+    work whose graph node has already given up on it.
+    """
+    global _cached_llm
+
+    if _llm_suppressed.get() or cancelled() or _llm_breaker.is_open():
+        return None
+
+    usage = current_usage()
+    if usage is not None and usage.exhausted():
+        usage.refuse()
+        return None
+
+    if _cached_llm is not None:
+        return _cached_llm
+
+    model = LLM_PROVIDERS[LLM_PROVIDER]()
+    if model is None:
+        return None
+
+    _cached_llm = MeteredLLM(CachedLLM(GuardedLLM(model, _llm_breaker)))
+
+    return _cached_llm
@@ -0,0 +1,118 @@
+"""Per-request LLM accounting and the optional LLM budget.
+
+While :func:`metering_llm_usage` is active every call through ``get_llm()``
+is recorded with its model, prompt and completion tokens, latency and the
+graph node that made it (see :func:`llm_caller`). Once the request has spent
+``LLM_TOKEN_BUDGET`` tokens or ``LLM_TIME_BUDGET_MS`` of cumulative LLM time,
+``get_llm()`` returns None and the remaining agents take their non-LLM
+fallbacks. Either budget set to 0 means unlimited.
+"""
+
+import os
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+LLM_TOKEN_BUDGET = int(os.getenv("LLM_TOKEN_BUDGET", "0"))
+LLM_TIME_BUDGET_MS = float(os.getenv("LLM_TIME_BUDGET_MS", "0"))
+
+_usage: ContextVar = ContextVar("llm_usage", default=None)
+_caller: ContextVar = ContextVar("llm_caller", default=None)
+
+
+class LLMUsage:
+    def __init__(self, token_budget: int = LLM_TOKEN_BUDGET, time_budget_ms: float = LLM_TIME_BUDGET_MS):
+        self.token_budget = token_budget
+        self.time_budget_ms = time_budget_ms
+        self._calls: list[dict] = []
+        self._refused = 0
+        self._lock = threading.Lock()
+
+    def record(self, model: str, prompt_tokens: int, completion_tokens: int,
+               latency_ms: float, cached: bool = False, failed: bool = False):
+        with self._lock:
+            self._calls.append({
+                "agent": _caller.get() or "unknown",
+                "model": model,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "latency_ms": round(latency_ms, 1),
+                "cached": cached,
+                "failed": failed
+            })
+
+    def _totals(self) -> tuple[int, float]:
+        tokens = sum(call["prompt_tokens"] + call["completion_tokens"] for call in self._calls)
+        return tokens, sum(call["latency_ms"] for call in self._calls)
+
+    def exhausted(self) -> bool:
+        with self._lock:
+            tokens, latency_ms = self._totals()
+        return bool(
+            (self.token_budget and tokens >= self.token_budget)
+            or (self.time_budget_ms and latency_ms >= self.time_budget_ms)
+        )
+
+    def refuse(self):
+        with self._lock:
+            self._refused += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            calls = list(self._calls)
+            tokens, latency_ms = self._totals()
+            refused = self._refused
+
+        by_agent: dict = {}
+        for call in calls:
+            agent = by_agent.setdefault(call["agent"], {
+                "calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "latency_ms": 0.0
+            })
+            agent["calls"] += 1
+            agent["prompt_tokens"] += call["prompt_tokens"]
+            agent["completion_tokens"] += call["completion_tokens"]
+            agent["latency_ms"] = round(agent["latency_ms"] + call["latency_ms"], 1)
+
+        return {
+            "calls": len(calls),
+            "cached_calls": sum(1 for call in calls if call["cached"]),
+            "prompt_tokens": sum(call["prompt_tokens"] for call in calls),
+            "completion_tokens": sum(call["completion_tokens"] for call in calls),
+            "total_tokens": tokens,
+            "latency_ms": round(latency_ms, 1),
+            "token_budget": self.token_budget or None,
+            "time_budget_ms": self.time_budget_ms or None,
+            # Calls turned into fallbacks because the budget was spent.
+            "refused_calls": refused,
+            "by_agent": by_agent,
+            "log": calls
+        }
+
+
+def current_usage() -> LLMUsage | None:
+    return _usage.get()
+
+
+def current_caller() -> str | None:
+    return _caller.get()
+
+
+@asynccontextmanager
+async def metering_llm_usage(**budgets):
+    """Record the LLM calls made inside the block (tasks and threads it starts included)."""
+    usage = LLMUsage(**budgets)
+    token = _usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage.reset(token)
+
+
+@contextmanager
+def llm_caller(name: str):
+    """Attribute LLM calls made inside the block to ``name``."""
+    token = _caller.set(name)
+    try:
+        yield
+    finally:
+        _caller.reset(token)
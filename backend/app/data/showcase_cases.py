@@ -368,8 +368,8 @@ SHOWCASE_CASES: Dict[str, Dict[str, Any]] = {
 }
 
 
-def resolve_showcase_case(molecule: Optional[str]) -> Optional[Dict[str, Any]]:
-    """Return curated showcase data when the molecule matches a spotlight case."""
+def resolve_showcase_name(molecule: Optional[str]) -> Optional[str]:
+    """Return the canonical showcase key for a molecule name or one of its aliases."""
     if not molecule:
         return None
 
@@ -377,5 +377,11 @@ def resolve_showcase_case(molecule: Optional[str]) -> Optional[Dict[str, Any]]:
     for name, payload in SHOWCASE_CASES.items():
         aliases = {name} | {alias.lower() for alias in payload.get("aliases", [])}
         if canonical in aliases:
-            return payload
+            return name
     return None
+
+
+def resolve_showcase_case(molecule: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Return curated showcase data when the molecule matches a spotlight case."""
+    name = resolve_showcase_name(molecule)
+    return SHOWCASE_CASES[name] if name else None
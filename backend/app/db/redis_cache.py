@@ -0,0 +1,316 @@
+"""Redis clients and the upstream response cache.
+
+Upstream payloads are cached under ``upstream:<service>:<xxhash of the
+normalized params>`` as zstd-compressed JSON with a per-service TTL. Cache
+reads and writes fail open: when Redis is unreachable the ``redis`` circuit
+breaker opens and calls go straight upstream.
+
+Reads check a byte-bounded in-process LRU (:class:`LocalCache`) before Redis;
+Redis hits are copied into it. Writes go to both tiers and are published on
+``INVALIDATION_CHANNEL`` so the other workers evict their local copy.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+
+import redis
+import redis.asyncio as aioredis
+import xxhash
+import zstandard
+
+from app.db.local_cache import LocalCache
+from app.utils.circuit_breaker import get_breaker, guarded
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT_SECONDS", "1"))
+
+UPSTREAM_CACHE_ENABLED = os.getenv("UPSTREAM_CACHE", "true").lower() in {"1", "true", "yes"}
+# Registry data moves faster than literature, which moves faster than patents.
+UPSTREAM_CACHE_TTLS = {
+    "pubmed": int(os.getenv("CACHE_TTL_PUBMED", str(3 * 86400))),
+    "clinicaltrials": int(os.getenv("CACHE_TTL_CLINICALTRIALS", str(12 * 3600))),
+    "patentsview": int(os.getenv("CACHE_TTL_PATENTSVIEW", str(7 * 86400))),
+}
+
+# In-process tier in front of Redis. Entries live at most LOCAL_CACHE_TTL_SECONDS
+# here; writes are announced on INVALIDATION_CHANNEL so other workers drop their
+# copy. LOCAL_CACHE_MAX_BYTES=0 turns the tier off.
+LOCAL_CACHE_MAX_BYTES = int(os.getenv("LOCAL_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+LOCAL_CACHE_TTL_SECONDS = float(os.getenv("LOCAL_CACHE_TTL_SECONDS", "60"))
+INVALIDATION_CHANNEL = "cache:invalidate"
+INVALIDATION_RETRY_SECONDS = 5
+
+# Request parameters that never influence the payload.
+UNKEYED_PARAMS = {"api_key"}
+
+_redis = None
+_redis_lock = threading.Lock()
+
+_async_redis = None
+_async_redis_loop = None
+
+
+def get_redis() -> redis.Redis:
+    """Return the process-wide sync Redis client; its connection pool is thread-safe."""
+    global _redis
+
+    if _redis is None:
+        with _redis_lock:
+            if _redis is None:
+                _redis = redis.Redis.from_url(REDIS_URL, socket_connect_timeout=REDIS_CONNECT_TIMEOUT)
+    return _redis
+
+
+def get_async_redis() -> aioredis.Redis:
+    """Return the process-wide asyncio Redis client for the running event loop.
+
+    Like the shared httpx client, the connection pool is bound to the loop that
+    opened it, so a new client is created when the loop changes.
+    """
+    global _async_redis, _async_redis_loop
+
+    loop = asyncio.get_running_loop()
+    if _async_redis is None or _async_redis_loop is not loop:
+        _async_redis = aioredis.Redis.from_url(REDIS_URL, socket_connect_timeout=REDIS_CONNECT_TIMEOUT)
+        _async_redis_loop = loop
+    return _async_redis
+
+
+async def close_async_redis():
+    global _async_redis, _async_redis_loop
+
+    if _async_redis is not None:
+        await _async_redis.aclose()
+    _async_redis = None
+    _async_redis_loop = None
+
+
+_cache_breaker = get_breaker("redis")
+_cache_stats: dict = {}
+_cache_stats_lock = threading.Lock()
+
+_local = LocalCache(LOCAL_CACHE_MAX_BYTES)
+# Lets a worker ignore its own invalidation messages.
+_instance_id = uuid.uuid4().hex
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def _count(service: str, tier: str, outcome: str):
+    with _cache_stats_lock:
+        tiers = _cache_stats.setdefault(service, {})
+        stats = tiers.setdefault(tier, {"hits": 0, "misses": 0, "errors": 0})
+        stats[outcome] += 1
+
+
+def cache_metrics() -> dict:
+    """Per-service hits, misses and hit ratio of each cache tier for this process."""
+    with _cache_stats_lock:
+        services = {
+            service: {
+                tier: {
+                    **stats,
+                    "hit_ratio": round(stats["hits"] / max(stats["hits"] + stats["misses"], 1), 3)
+                }
+                for tier, stats in tiers.items()
+            }
+            for service, tiers in _cache_stats.items()
+        }
+    return {"local": _local.snapshot(), "services": services}
+
+
+def _listen_for_invalidations():
+    while True:
+        subscribed = False
+        try:
+            pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            subscribed = True
+            for message in pubsub.listen():
+                origin, _, key = message["data"].decode().partition(" ")
+                if origin != _instance_id:
+                    _local.discard(key)
+        except Exception:
+            pass
+        if subscribed:
+            # Invalidations sent while we were disconnected are lost.
+            _local.clear()
+        time.sleep(INVALIDATION_RETRY_SECONDS)
+
+
+def _ensure_listener():
+    global _listener
+
+    if _listener is None:
+        with _listener_lock:
+            if _listener is None:
+                _listener = threading.Thread(
+                    target=_listen_for_invalidations, name="cache-invalidation", daemon=True
+                )
+                _listener.start()
+
+
+def _local_get(service: str, key: str) -> bytes | None:
+    if not LOCAL_CACHE_MAX_BYTES:
+        return None
+    _ensure_listener()
+    raw = _local.get(key)
+    _count(service, "local", "hits" if raw is not None else "misses")
+    return raw
+
+
+def _local_set(key: str, raw: bytes, ttl: float):
+    if LOCAL_CACHE_MAX_BYTES:
+        _local.set(key, raw, min(ttl, LOCAL_CACHE_TTL_SECONDS))
+
+
+def _invalidation(key: str) -> str:
+    return f"{_instance_id} {key}"
+
+
+def upstream_key(service: str, params: dict) -> str:
+    normalized = {key: str(value) for key, value in params.items() if key not in UNKEYED_PARAMS}
+    digest = xxhash.xxh3_128_hexdigest(json.dumps(normalized, sort_keys=True))
+    return f"upstream:{service}:{digest}"
+
+
+def _pack(value) -> bytes:
+    return zstandard.ZstdCompressor().compress(json.dumps(value, default=str).encode())
+
+
+def _unpack(raw: bytes):
+    return json.loads(zstandard.ZstdDecompressor().decompress(raw))
+
+
+def cache_load(service: str, key: str):
+    """Value stored under ``key`` or None, checking this process before Redis.
+
+    Hits and misses are counted per tier under ``service``.
+    """
+    raw = _local_get(service, key)
+    if raw is None:
+        try:
+            with guarded(_cache_breaker):
+                raw = get_redis().get(key)
+        except Exception:
+            _count(service, "redis", "errors")
+            return None
+        _count(service, "redis", "hits" if raw is not None else "misses")
+        if raw is None:
+            return None
+        _local_set(key, raw, LOCAL_CACHE_TTL_SECONDS)
+    return _unpack(raw)
+
+
+def cache_store(service: str, key: str, value, ttl: int):
+    """Write ``value`` to both tiers and evict it from the other workers' local tier."""
+    raw = _pack(value)
+    _local_set(key, raw, ttl)
+    try:
+        with guarded(_cache_breaker):
+            pipeline = get_redis().pipeline(transaction=False)
+            pipeline.set(key, raw, ex=ttl)
+            pipeline.publish(INVALIDATION_CHANNEL, _invalidation(key))
+            pipeline.execute()
+    except Exception:
+        _count(service, "redis", "errors")
+
+
+async def acache_load(service: str, key: str):
+    """Async variant of :func:`cache_load`."""
+    raw = _local_get(service, key)
+    if raw is None:
+        try:
+            with guarded(_cache_breaker):
+                raw = await get_async_redis().get(key)
+        except Exception:
+            _count(service, "redis", "errors")
+            return None
+        _count(service, "redis", "hits" if raw is not None else "misses")
+        if raw is None:
+            return None
+        _local_set(key, raw, LOCAL_CACHE_TTL_SECONDS)
+    return _unpack(raw)
+
+
+async def acache_store(service: str, key: str, value, ttl: int):
+    raw = _pack(value)
+    _local_set(key, raw, ttl)
+    try:
+        with guarded(_cache_breaker):
+            pipeline = get_async_redis().pipeline(transaction=False)
+            pipeline.set(key, raw, ex=ttl)
+            pipeline.publish(INVALIDATION_CHANNEL, _invalidation(key))
+            await pipeline.execute()
+    except Exception:
+        _count(service, "redis", "errors")
+
+
+async def aclaim(key: str, seconds: int) -> bool:
+    """Take a short-lived cross-worker claim on ``key``; False if someone else holds it."""
+    try:
+        with guarded(_cache_breaker):
+            return bool(await get_async_redis().set(key, 1, nx=True, ex=seconds))
+    except Exception:
+        return True
+
+
+async def arelease(key: str):
+    """Drop a claim taken with :func:`aclaim`; one that cannot be dropped still expires."""
+    try:
+        with guarded(_cache_breaker):
+            await get_async_redis().delete(key)
+    except Exception:
+        pass
+
+
+def cache_get(service: str, params: dict):
+    """Cached upstream payload for ``params`` or None (also when the cache is off or down)."""
+    if not UPSTREAM_CACHE_ENABLED:
+        return None
+    return cache_load(service, upstream_key(service, params))
+
+
+def cache_set(service: str, params: dict, value):
+    if not UPSTREAM_CACHE_ENABLED:
+        return
+    cache_store(service, upstream_key(service, params), value, UPSTREAM_CACHE_TTLS[service])
+
+
+async def acache_get(service: str, params: dict):
+    """Async variant of :func:`cache_get`."""
+    if not UPSTREAM_CACHE_ENABLED:
+        return None
+    return await acache_load(service, upstream_key(service, params))
+
+
+async def acache_set(service: str, params: dict, value):
+    if not UPSTREAM_CACHE_ENABLED:
+        return
+    await acache_store(service, upstream_key(service, params), value, UPSTREAM_CACHE_TTLS[service])
+
+
+def cached_json(service: str, params: dict, fetch, refresh: bool = False):
+    """Return the cached payload for ``params``, or ``fetch()`` it and cache it.
+
+    Exceptions from ``fetch`` propagate and nothing is cached, so failures
+    are never served from the cache. ``refresh`` skips the read.
+    """
+    payload = None if refresh else cache_get(service, params)
+    if payload is None:
+        payload = fetch()
+        cache_set(service, params, payload)
+    return payload
+
+
+async def acached_json(service: str, params: dict, fetch, refresh: bool = False):
+    """Async variant of :func:`cached_json`; ``fetch`` returns an awaitable."""
+    payload = None if refresh else await acache_get(service, params)
+    if payload is None:
+        payload = await fetch()
+        await acache_set(service, params, payload)
+    return payload
@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+from app.core.llm_provider import llm_suppressed
+from app.core.llm_usage import llm_caller
+from app.utils.cancellation import cancellable
+
+# Fraction of the request budget each node may spend. research -> market ->
+# final_verdict is the critical path, so those shares add up to less than the
+# whole budget; clinical and patent run alongside research and market and can
+# take a larger slice. Scoring is pure CPU and is never cut short.
+NODE_BUDGET_SHARES = {
+    "research": 0.45,
+    "clinical": 0.7,
+    "patent": 0.7,
+    "market": 0.25,
+    "final_verdict": 0.25,
+}
+
+BUDGET_EXHAUSTED_REASON = "the request latency budget was exhausted"
+
+
+def budget_input(budget_ms: int | None) -> dict:
+    """Graph input keys that arm the per-node deadlines for one request."""
+    if not budget_ms:
+        return {}
+    return {
+        "budget_ms": budget_ms,
+        "deadline": time.monotonic() + budget_ms / 1000
+    }
+
+
+def node_timeout(state: dict, node: str) -> float | None:
+    """Seconds the node may run: its share of the budget, capped by the request deadline."""
+    budget_ms = state.get("budget_ms")
+    deadline = state.get("deadline")
+    if not budget_ms or deadline is None:
+        return None
+
+    node_slice = budget_ms * NODE_BUDGET_SHARES.get(node, 1.0) / 1000
+    return max(0.0, min(node_slice, deadline - time.monotonic()))
+
+
+async def within_budget(state: dict, node: str, key: str, operation, fallback) -> dict:
+    """Await ``operation()`` within the node's slice and return the node's state update.
+
+    On timeout the result of ``fallback()`` is used instead, computed with the LLM
+    suppressed so it returns immediately, and the node is recorded in
+    ``degraded_nodes``. Worker threads the operation started are told to stop
+    (see ``app/utils/cancellation.py``). Without a budget the operation runs
+    unbounded. LLM calls made inside are attributed to ``node`` in the
+    request's LLM usage.
+    """
+    with llm_caller(node), cancellable() as cancel:
+        timeout = node_timeout(state, node)
+        if timeout is None:
+            return {key: await operation()}
+
+        try:
+            return {key: await asyncio.wait_for(operation(), timeout)}
+        except asyncio.TimeoutError:
+            cancel.set()
+            with llm_suppressed():
+                payload = fallback()
+            return {key: payload, "degraded_nodes": [node]}
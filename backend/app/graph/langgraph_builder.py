@@ -1,112 +1,59 @@
-from langgraph.graph import StateGraph
-
-from app.agents.research_agent import ResearchAgent
-from app.agents.clinical_agent import ClinicalAgent
-from app.agents.patent_agent import PatentAgent
-from app.agents.market_agent import MarketAgent
-
-from app.core.scoring_engine import compute_score
-from app.core.final_verdict_agent import generate_final_verdict
-
-
-def extract_diseases(research: dict) -> list[str]:
-    """Extract unique diseases from research agent"""
-    diseases = []
-    for ev in research.get("positive_evidence", []):
-        d = ev.get("disease")
-        if d and d not in diseases:
-            diseases.append(d)
-    return diseases
+import operator
+from typing import Annotated, Optional, TypedDict
+
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import END, START, StateGraph
+
+from app.graph.nodes.clinical_node import aclinical_node, clinical_node
+from app.graph.nodes.market_node import amarket_node, market_node
+from app.graph.nodes.patent_node import apatent_node, patent_node
+from app.graph.nodes.research_node import aresearch_node, extract_diseases, research_node
+from app.graph.nodes.scoring_node import afinal_verdict_node, final_verdict_node, scoring_node
+
+__all__ = ["Case1State", "build_case1_graph", "extract_diseases"]
+
+
+class Case1State(TypedDict, total=False):
+    molecule: Optional[str]
+    disease: Optional[str]
+    trend_mode: bool
+    # Optional latency budget (see app/graph/budget.py); only the async path
+    # enforces it. Nodes that fell back to offline payloads append themselves
+    # to degraded_nodes.
+    budget_ms: Optional[int]
+    deadline: Optional[float]
+    degraded_nodes: Annotated[list[str], operator.add]
+    research: dict
+    clinical_trials: dict
+    patents: dict
+    market: dict
+    scoring_engine: dict
+    final_verdict: dict
 
 
 def build_case1_graph():
-    graph = StateGraph(dict)
-
-    # ---------- RESEARCH ----------
-    graph.add_node(
-        "research",
-        lambda s: {
-            **s,
-            "research": ResearchAgent().run({
-                "molecule": s.get("molecule"),
-                "disease": None
-            })
-        }
-    )
-
-    # ---------- CLINICAL ----------
-    graph.add_node(
-        "clinical",
-        lambda s: {
-            **s,
-            "clinical_trials": ClinicalAgent().run({
-                "molecule": s.get("molecule"),
-                "disease": None  # molecule-based trials
-            })
-        }
-    )
-
-    # ---------- PATENT ----------
-    graph.add_node(
-        "patent",
-        lambda s: {
-            **s,
-            "patents": PatentAgent().run({
-                "molecule": s.get("molecule"),
-                "disease": None
-            })
-        }
-    )
-
-    # ---------- MARKET ----------
-    graph.add_node(
-        "market",
-        lambda s: {
-            **s,
-            "market": MarketAgent().run({
-                "molecule": s.get("molecule"),
-                "disease": (
-                    extract_diseases(s["research"])[0]
-                    if extract_diseases(s["research"])
-                    else "Unknown"
-                )
-            })
-        }
-    )
-
-    # ---------- SCORING ----------
-    graph.add_node(
-        "scoring",
-        lambda s: {
-            **s,
-            "scoring_engine": compute_score(
-                s["research"],
-                s["clinical_trials"],
-                s["patents"],
-                s["market"]
-            )
-        }
-    )
-
-    # ---------- FINAL VERDICT ----------
-    graph.add_node(
-        "final_verdict",
-        lambda s: {
-            **s,
-            "final_verdict": generate_final_verdict(
-                s["scoring_engine"],
-                extract_diseases(s["research"]),
-                s.get("molecule")
-            )
-        }
-    )
+    # Nodes return only the keys they own so parallel branches can be merged
+    # into the shared state without clobbering each other.
+    graph = StateGraph(Case1State)
+
+    # Agent nodes carry a sync and an async implementation: graph.invoke uses
+    # the former, graph.ainvoke awaits the latter on the shared httpx client.
+    graph.add_node("research", RunnableLambda(research_node, afunc=aresearch_node))
+    graph.add_node("clinical", RunnableLambda(clinical_node, afunc=aclinical_node))
+    graph.add_node("patent", RunnableLambda(patent_node, afunc=apatent_node))
+    graph.add_node("market", RunnableLambda(market_node, afunc=amarket_node))
+    graph.add_node("scoring", scoring_node)
+    graph.add_node("final_verdict", RunnableLambda(final_verdict_node, afunc=afinal_verdict_node))
 
     # ---------- FLOW ----------
-    graph.set_entry_point("research")
-    graph.add_edge("research", "clinical")
-    graph.add_edge("clinical", "patent")
-    graph.add_edge("patent", "market")
-    graph.add_edge("market", "scoring")
+    # research, clinical and patent are independent and fan out from START.
+    # market only needs the research diseases; scoring joins every branch.
+    graph.add_edge(START, "research")
+    graph.add_edge(START, "clinical")
+    graph.add_edge(START, "patent")
+    graph.add_edge("research", "market")
+    graph.add_edge(["market", "clinical", "patent"], "scoring")
     graph.add_edge("scoring", "final_verdict")
+    graph.add_edge("final_verdict", END)
 
     return graph.compile()
@@ -0,0 +1,25 @@
+from app.agents.clinical_agent import ClinicalAgent
+from app.graph.budget import BUDGET_EXHAUSTED_REASON, within_budget
+
+
+def _clinical_payload(state: dict) -> dict:
+    return {
+        "molecule": state.get("molecule"),
+        "disease": None  # molecule-based trials
+    }
+
+
+def clinical_node(state: dict) -> dict:
+    return {"clinical_trials": ClinicalAgent().run(_clinical_payload(state))}
+
+
+async def aclinical_node(state: dict) -> dict:
+    agent = ClinicalAgent()
+    payload = _clinical_payload(state)
+    return await within_budget(
+        state,
+        "clinical",
+        "clinical_trials",
+        lambda: agent.arun(payload),
+        lambda: agent.fallback(payload, BUDGET_EXHAUSTED_REASON)
+    )
@@ -0,0 +1,27 @@
+from app.agents.market_agent import MarketAgent
+from app.graph.budget import BUDGET_EXHAUSTED_REASON, within_budget
+from app.graph.nodes.research_node import extract_diseases
+
+
+def _market_payload(state: dict) -> dict:
+    diseases = extract_diseases(state["research"])
+    return {
+        "molecule": state.get("molecule"),
+        "disease": diseases[0] if diseases else "Unknown"
+    }
+
+
+def market_node(state: dict) -> dict:
+    return {"market": MarketAgent().run(_market_payload(state))}
+
+
+async def amarket_node(state: dict) -> dict:
+    agent = MarketAgent()
+    payload = _market_payload(state)
+    return await within_budget(
+        state,
+        "market",
+        "market",
+        lambda: agent.arun(payload),
+        lambda: agent.fallback(payload, BUDGET_EXHAUSTED_REASON)
+    )
@@ -0,0 +1,25 @@
+from app.agents.patent_agent import PatentAgent
+from app.graph.budget import BUDGET_EXHAUSTED_REASON, within_budget
+
+
+def _patent_payload(state: dict) -> dict:
+    return {
+        "molecule": state.get("molecule"),
+        "disease": None
+    }
+
+
+def patent_node(state: dict) -> dict:
+    return {"patents": PatentAgent().run(_patent_payload(state))}
+
+
+async def apatent_node(state: dict) -> dict:
+    agent = PatentAgent()
+    payload = _patent_payload(state)
+    return await within_budget(
+        state,
+        "patent",
+        "patents",
+        lambda: agent.arun(payload),
+        lambda: agent.fallback(payload, BUDGET_EXHAUSTED_REASON)
+    )
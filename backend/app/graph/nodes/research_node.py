@@ -0,0 +1,35 @@
+from app.agents.research_agent import ResearchAgent
+from app.graph.budget import BUDGET_EXHAUSTED_REASON, within_budget
+
+
+def extract_diseases(research: dict) -> list[str]:
+    """Extract unique diseases from research agent"""
+    diseases = []
+    for ev in research.get("positive_evidence", []):
+        d = ev.get("disease")
+        if d and d not in diseases:
+            diseases.append(d)
+    return diseases
+
+
+def _research_payload(state: dict) -> dict:
+    return {
+        "molecule": state.get("molecule"),
+        "disease": None
+    }
+
+
+def research_node(state: dict) -> dict:
+    return {"research": ResearchAgent().run(_research_payload(state))}
+
+
+async def aresearch_node(state: dict) -> dict:
+    agent = ResearchAgent()
+    payload = _research_payload(state)
+    return await within_budget(
+        state,
+        "research",
+        "research",
+        lambda: agent.arun(payload),
+        lambda: agent.fallback(payload, BUDGET_EXHAUSTED_REASON)
+    )
@@ -0,0 +1,44 @@
+import asyncio
+
+from app.core.final_verdict_agent import generate_final_verdict
+from app.core.scoring_engine import compute_score
+from app.graph.budget import within_budget
+from app.graph.nodes.research_node import extract_diseases
+
+
+def scoring_node(state: dict) -> dict:
+    return {
+        "scoring_engine": compute_score(
+            state["research"],
+            state["clinical_trials"],
+            state["patents"],
+            state["market"]
+        )
+    }
+
+
+def final_verdict_node(state: dict) -> dict:
+    return {
+        "final_verdict": generate_final_verdict(
+            state["scoring_engine"],
+            extract_diseases(state["research"]),
+            state.get("molecule")
+        )
+    }
+
+
+async def afinal_verdict_node(state: dict) -> dict:
+    args = (
+        state["scoring_engine"],
+        extract_diseases(state["research"]),
+        state.get("molecule")
+    )
+    # The fallback reruns generate_final_verdict with the LLM suppressed,
+    # which yields the score-based verdict.
+    return await within_budget(
+        state,
+        "final_verdict",
+        "final_verdict",
+        lambda: asyncio.to_thread(generate_final_verdict, *args),
+        lambda: generate_final_verdict(*args)
+    )
@@ -1,13 +1,33 @@
 import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from app.controllers.job_controller import JobWorkerPool
+from app.db.redis_cache import close_async_redis
+from app.graph.registry import warm_graphs
+from app.routes.job_route import router as job_router
+from app.routes.metrics_route import router as metrics_router
 from app.routes.repurpose_route import router
+from app.utils.http import close_async_client
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    warm_graphs()
+    job_workers = JobWorkerPool()
+    job_workers.start()
+    yield
+    await job_workers.stop()
+    await close_async_client()
+    await close_async_redis()
+
 
-app = FastAPI(title="Drug Repurposing Platform")
+app = FastAPI(title="Drug Repurposing Platform", lifespan=lifespan)
 
 raw_origins = os.getenv(
     "ALLOWED_ORIGINS",
@@ -28,3 +48,5 @@ app.add_middleware(
 )
 
 app.include_router(router)
+app.include_router(job_router)
+app.include_router(metrics_router)
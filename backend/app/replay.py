@@ -0,0 +1,75 @@
+"""Replay stand-in for the upstream APIs: ``python -m app.replay``.
+
+Serves cassettes recorded with ``UPSTREAM_MODE=record`` at
+``/<host>/<path>``, which is where ``UPSTREAM_MODE=replay`` sends requests.
+Each response is delayed by its recorded latency times
+``REPLAY_LATENCY_SCALE``, plus ``REPLAY_LATENCY_MS``. A ``REPLAY_ERROR_RATE``
+fraction of requests gets a 503 instead. Set ``REPLAY_SEED`` to make the
+injected failures repeat run to run.
+"""
+
+import asyncio
+import os
+import random
+from urllib.parse import urlsplit
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+
+from app.utils.cassettes import CASSETTE_DIR, REPLAY_URL, load_cassette
+
+REPLAY_LATENCY_SCALE = float(os.getenv("REPLAY_LATENCY_SCALE", "1"))
+REPLAY_LATENCY_MS = float(os.getenv("REPLAY_LATENCY_MS", "0"))
+REPLAY_ERROR_RATE = float(os.getenv("REPLAY_ERROR_RATE", "0"))
+REPLAY_SEED = os.getenv("REPLAY_SEED")
+
+
+def create_app(
+    latency_scale: float = REPLAY_LATENCY_SCALE,
+    latency_ms: float = REPLAY_LATENCY_MS,
+    error_rate: float = REPLAY_ERROR_RATE,
+    seed: str | None = REPLAY_SEED
+) -> FastAPI:
+    app = FastAPI(title="Upstream replay stand-in")
+    rng = random.Random(seed)
+    app.state.served = 0
+    app.state.missing = 0
+    app.state.injected_errors = 0
+
+    @app.api_route("/{host}/{path:path}", methods=["GET", "POST"])
+    async def replay(host: str, path: str, request: Request):
+        if rng.random() < error_rate:
+            app.state.injected_errors += 1
+            return JSONResponse({"detail": "Injected upstream failure"}, status_code=503)
+
+        recorded = load_cassette(
+            request.method, host, f"/{path}", request.url.query, await request.body()
+        )
+        if recorded is None:
+            app.state.missing += 1
+            return JSONResponse({"detail": "No cassette recorded for this request"}, status_code=404)
+
+        meta, body = recorded
+        delay_ms = meta.get("latency_ms", 0) * latency_scale + latency_ms
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+
+        app.state.served += 1
+        return Response(body, status_code=meta["status"], media_type=meta.get("content_type"))
+
+    return app
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    address = urlsplit(REPLAY_URL)
+    print(f"Replaying cassettes from {CASSETTE_DIR}")
+    uvicorn.run(app, host=address.hostname, port=address.port or 80)
@@ -0,0 +1,64 @@
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Body, HTTPException, status
+
+from app.controllers.job_controller import ANALYSIS, BATCH, get_job_backend, submit_job
+from app.controllers.repurpose_controller import (
+    MAX_BATCH_ITEMS,
+    NO_CACHE_UNSUPPORTED_DETAIL,
+    resolve_batch_item,
+    resolve_case,
+)
+from app.schemas.request_schema import RepurposeRequest
+
+router = APIRouter()
+
+
+@router.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def create_job(
+    payload: Annotated[
+        RepurposeRequest | list[Any],
+        Body(description="A single /repurpose payload or a batch of them")
+    ]
+):
+    if isinstance(payload, list):
+        if not payload or len(payload) > MAX_BATCH_ITEMS:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"A batch job needs between 1 and {MAX_BATCH_ITEMS} items."
+            )
+        analyses, rejected = [], []
+        for index, item in enumerate(payload):
+            try:
+                case_type, case_probe, budget_ms = resolve_batch_item(item)
+            except HTTPException as exc:
+                rejected.append({"index": index, "status": "error", "detail": exc.detail})
+                continue
+            analyses.append((case_type, case_probe, budget_ms, index))
+        job = await submit_job(BATCH, analyses, rejected)
+    else:
+        if payload.no_cache:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=NO_CACHE_UNSUPPORTED_DETAIL
+            )
+        case_type, case_probe = resolve_case(payload)
+        job = await submit_job(ANALYSIS, [(case_type, case_probe, payload.budget_ms, 0)])
+
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": f"/jobs/{job['id']}"
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await get_job_backend().get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found or expired."
+        )
+    job.pop("analyses", None)
+    return job
@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+
+from app.db.redis_cache import cache_metrics
+from app.utils.circuit_breaker import circuit_breaker_metrics
+from app.utils.latency import latency_metrics
+from app.utils.rate_limit import rate_limit_metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def metrics():
+    """Process-local operational counters (each worker reports its own)."""
+    return {
+        "rate_limits": rate_limit_metrics(),
+        "circuit_breakers": circuit_breaker_metrics(),
+        "latency": latency_metrics(),
+        "cache": cache_metrics()
+    }
@@ -1,97 +1,152 @@
-from datetime import datetime
-
-from fastapi import APIRouter, HTTPException, Query, status
-
-from app.core.decision_layer import detect_case
-from app.graph.langgraph_builder import build_case1_graph
+import json
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Body, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from app.controllers.repurpose_controller import (
+    BATCH_CONCURRENCY,
+    GRAPH_FAILURE_DETAIL,
+    MAX_BATCH_ITEMS,
+    build_response,
+    cached_analysis,
+    resolve_batch_item,
+    resolve_case,
+    run_batch,
+    stream_analysis,
+)
 from app.schemas.request_schema import RepurposeRequest
 
 router = APIRouter()
 
-UNSUPPORTED_CASE_MESSAGES = {
-    "CASE_2_DISEASE_ONLY": "Disease-only workflows are not supported yet.",
-    "CASE_4_TRENDS": "Trend and intelligence mode is not available yet."
-}
-
+MAX_BATCH_CONCURRENCY = 64
 
-def _process_repurpose_request(payload: RepurposeRequest):
-    molecule = (payload.molecule or "").strip()
-    disease = (payload.disease or "").strip() or None
 
-    if not molecule:
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail="Please provide a molecule or drug name to run the analysis."
-        )
-
-    case_probe = {
-        "molecule": molecule,
-        "disease": disease,
-        "trend_mode": payload.trend_mode
-    }
+async def _process_repurpose_request(payload: RepurposeRequest):
+    case_type, case_probe = resolve_case(payload)
 
     try:
-        case_type = detect_case(case_probe)
-    except ValueError as exc:
+        state, provenance = await cached_analysis(case_type, case_probe, payload.budget_ms, payload.no_cache)
+    except Exception as exc:
         raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail=str(exc)
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=GRAPH_FAILURE_DETAIL
         ) from exc
 
-    if case_type in UNSUPPORTED_CASE_MESSAGES:
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail=UNSUPPORTED_CASE_MESSAGES[case_type]
-        )
+    return build_response(case_type, case_probe, state, **provenance)
 
-    graph = build_case1_graph()
 
-    try:
-        state = graph.invoke({
-            "molecule": molecule,
-            "disease": disease,
-            "trend_mode": payload.trend_mode
-        })
-    except Exception as exc:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to orchestrate the agent graph."
-        ) from exc
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
 
-    timestamp = datetime.utcnow().isoformat() + "Z"
-
-    return {
-        "query_metadata": {
-            "case_type": case_type,
-            "input": case_probe,
-            "generated_at": timestamp
-        },
-        "agents": {
-            "research": state.get("research", {}),
-            "clinical_trials": state.get("clinical_trials", {}),
-            "patents": state.get("patents", {}),
-            "market": state.get("market", {})
-        },
-        "scoring_engine": state.get("scoring_engine", {}),
-        "final_verdict": state.get("final_verdict", {}),
-        "export": {
-            "pdf_available": False,
-            "pdf_url": None
-        }
-    }
+async def _stream_repurpose_events(case_type: str, case_probe: dict, budget_ms: int | None, no_cache: bool = False):
+    """Yield one SSE event per finished graph node, then the assembled response.
+
+    Event names are the node names from ``build_case1_graph`` (research,
+    clinical, patent, market, scoring, final_verdict); the closing
+    ``complete`` event carries the same body as ``/repurpose``.
+    """
+    try:
+        async for node, values in stream_analysis(case_type, case_probe, budget_ms, no_cache):
+            if node is None:
+                yield _sse_event("complete", build_response(case_type, case_probe, values))
+            else:
+                yield _sse_event(node, values)
+    except Exception:
+        yield _sse_event("error", {"detail": GRAPH_FAILURE_DETAIL})
+
+
+async def _stream_batch_results(items: list, concurrency: int):
+    """Yield one NDJSON line per input item, in completion order.
+
+    Items that fail validation are reported first; duplicates (including
+    showcase aliases) share a single run and are emitted together.
+    """
+    analyses, positions = [], []
+    for index, item in enumerate(items):
+        try:
+            analyses.append(resolve_batch_item(item))
+        except HTTPException as exc:
+            yield json.dumps({"index": index, "status": "error", "detail": exc.detail}) + "\n"
+            continue
+        positions.append(index)
+
+    async for group, state, error in run_batch(analyses, concurrency):
+        for position in group:
+            index = positions[position]
+            if error is not None:
+                line = {"index": index, "status": "error", "detail": GRAPH_FAILURE_DETAIL}
+            else:
+                case_type, case_probe, _ = analyses[position]
+                line = {
+                    "index": index,
+                    "status": "ok",
+                    "result": build_response(case_type, case_probe, state)
+                }
+            yield json.dumps(line, default=str) + "\n"
 
 
 @router.post("/repurpose")
-def repurpose(payload: RepurposeRequest):
-    return _process_repurpose_request(payload)
+async def repurpose(payload: RepurposeRequest):
+    return await _process_repurpose_request(payload)
 
 
 @router.get("/repurpose")
-def repurpose_get(
+async def repurpose_get(
     molecule: str | None = Query(default=None, description="Molecule or drug name"),
     drug: str | None = Query(default=None, description="Alias for molecule or drug name"),
     disease: str | None = Query(default=None, description="Optional disease context"),
-    trend_mode: bool = Query(default=False, description="Toggle trend intelligence mode")
+    trend_mode: bool = Query(default=False, description="Toggle trend intelligence mode"),
+    budget_ms: int | None = Query(default=None, gt=0, description="Optional end-to-end latency budget in milliseconds"),
+    no_cache: bool = Query(default=False, description="Recompute instead of serving cached responses or LLM completions")
+):
+    payload = RepurposeRequest(
+        molecule=molecule or drug,
+        disease=disease,
+        trend_mode=trend_mode,
+        budget_ms=budget_ms,
+        no_cache=no_cache
+    )
+    return await _process_repurpose_request(payload)
+
+
+@router.get("/repurpose/stream")
+async def repurpose_stream(
+    molecule: str | None = Query(default=None, description="Molecule or drug name"),
+    drug: str | None = Query(default=None, description="Alias for molecule or drug name"),
+    disease: str | None = Query(default=None, description="Optional disease context"),
+    trend_mode: bool = Query(default=False, description="Toggle trend intelligence mode"),
+    budget_ms: int | None = Query(default=None, gt=0, description="Optional end-to-end latency budget in milliseconds"),
+    no_cache: bool = Query(default=False, description="Recompute instead of serving cached responses or LLM completions")
+):
+    payload = RepurposeRequest(
+        molecule=molecule or drug,
+        disease=disease,
+        trend_mode=trend_mode,
+        budget_ms=budget_ms,
+        no_cache=no_cache
+    )
+    case_type, case_probe = resolve_case(payload)
+    return StreamingResponse(
+        _stream_repurpose_events(case_type, case_probe, payload.budget_ms, payload.no_cache),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/repurpose/batch")
+async def repurpose_batch(
+    # Items are validated one by one so a bad entry only fails its own line.
+    items: Annotated[list[Any], Body(min_length=1, max_length=MAX_BATCH_ITEMS)],
+    concurrency: int = Query(
+        default=BATCH_CONCURRENCY,
+        ge=1,
+        le=MAX_BATCH_CONCURRENCY,
+        description="Maximum number of graphs running at once"
+    )
 ):
-    payload = RepurposeRequest(molecule=molecule or drug, disease=disease, trend_mode=trend_mode)
-    return _process_repurpose_request(payload)
+    return StreamingResponse(
+        _stream_batch_results(items, concurrency),
+        media_type="application/x-ndjson"
+    )
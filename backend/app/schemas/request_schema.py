@@ -18,6 +18,15 @@ class RepurposeRequest(BaseModel):
 		default=False,
 		description="Whether to run the trend intelligence pipeline",
 	)
+	budget_ms: Optional[int] = Field(
+		default=None,
+		gt=0,
+		description="Optional end-to-end latency budget; agents that miss their slice fall back to offline payloads",
+	)
+	no_cache: bool = Field(
+		default=False,
+		description="Recompute instead of serving cached responses or LLM completions; the fresh result is still cached",
+	)
 
 	class Config:
 		extra = "forbid"
@@ -1,43 +1,138 @@
-import requests
+"""ClinicalTrials.gov registry access through the v2 studies API.
+
+Results are paged with ``nextPageToken`` and projected to the handful of
+fields the clinical agent reads. Each page is flattened into StudyFields-style
+records (``NCTId``, ``BriefTitle``, ...) and yielded one by one, so only the
+current page is ever held in memory. Pages are cached per request params.
+"""
+
 from datetime import datetime
 
-API_URL = "https://clinicaltrials.gov/api/query/study_fields"
+from app.db.redis_cache import acached_json, cached_json
+from app.utils.http import async_get_json, get_json
 
-def fetch_trials(molecule: str, disease: str | None = None, limit: int = 15):
-	if not molecule:
-		return []
+API_URL = "https://clinicaltrials.gov/api/v2/studies"
 
+PAGE_SIZE = 100
+TIMEOUT = 10
+
+FIELDS = [
+	"NCTId",
+	"BriefTitle",
+	"OfficialTitle",
+	"Condition",
+	"Phase",
+	"OverallStatus",
+	"BriefSummary",
+	"EnrollmentCount",
+	"StartDate",
+	"LocationCountry",
+	"LeadSponsorName"
+]
+
+
+def _build_params(molecule: str, disease: str | None, page_size: int, page_token: str | None = None) -> dict:
 	current_year = datetime.utcnow().year
 	from_year = current_year - 50
 
-	expr = molecule
+	term = molecule
 	if disease:
-		expr = f"{molecule} {disease}"
-
-	expr = f"({expr}) AND (FIRSTPOSTEDDATE:[{from_year}-01-01 TO {current_year}-12-31])"
+		term = f"{molecule} {disease}"
 
 	params = {
-		"expr": expr,
-		"fields": ",".join([
-			"NCTId",
-			"BriefTitle",
-			"Condition",
-			"Phase",
-			"OverallStatus",
-			"BriefSummary",
-			"EnrollmentCount",
-			"StartDate",
-			"LocationCountry",
-			"LeadSponsorName"
-		]),
-		"min_rnk": 1,
-		"max_rnk": limit,
-		"fmt": "json"
+		"query.term": term,
+		"filter.advanced": f"AREA[StudyFirstPostDate]RANGE[{from_year}-01-01,{current_year}-12-31]",
+		"fields": ",".join(FIELDS),
+		"pageSize": page_size,
+		"format": "json"
 	}
+	if page_token:
+		params["pageToken"] = page_token
+	return params
+
+
+def _label(value: str | None) -> str | None:
+	# v2 enums look like "ACTIVE_NOT_RECRUITING" / "PHASE2"; v1 used readable labels.
+	if not value or value == "NA":
+		return value
+	return value.replace("_", " ").replace("PHASE", "PHASE ").strip().capitalize()
+
+
+def _flatten_study(study: dict) -> dict:
+	protocol = study.get("protocolSection", {})
+	identification = protocol.get("identificationModule", {})
+	status = protocol.get("statusModule", {})
+	design = protocol.get("designModule", {})
+	locations = protocol.get("contactsLocationsModule", {}).get("locations") or []
+
+	return {
+		"NCTId": identification.get("nctId"),
+		"BriefTitle": identification.get("briefTitle"),
+		"OfficialTitle": identification.get("officialTitle"),
+		"Condition": protocol.get("conditionsModule", {}).get("conditions") or [],
+		"Phase": [_label(phase) for phase in design.get("phases") or []],
+		"OverallStatus": _label(status.get("overallStatus")),
+		"BriefSummary": protocol.get("descriptionModule", {}).get("briefSummary"),
+		"EnrollmentCount": design.get("enrollmentInfo", {}).get("count"),
+		"StartDate": status.get("startDateStruct", {}).get("date"),
+		"LocationCountry": [location["country"] for location in locations if location.get("country")],
+		"LeadSponsorName": protocol.get("sponsorCollaboratorsModule", {}).get("leadSponsor", {}).get("name")
+	}
+
+
+def iter_trials(molecule: str, disease: str | None = None, limit: int = 15, page_size: int = PAGE_SIZE):
+	"""Yield up to ``limit`` flattened studies, fetching pages only as they are consumed.
+
+	A failed page ends the sweep; studies already yielded are kept.
+	"""
+	if not molecule:
+		return
+
+	remaining, page_token = limit, None
+	while remaining > 0:
+		params = _build_params(molecule, disease, min(page_size, remaining), page_token)
+		try:
+			data = cached_json("clinicaltrials", params, lambda: get_json(API_URL, params=params, timeout=TIMEOUT))
+		except Exception:
+			return
+
+		for study in data.get("studies", [])[:remaining]:
+			remaining -= 1
+			yield _flatten_study(study)
+
+		page_token = data.get("nextPageToken")
+		if not page_token:
+			return
+
+
+async def aiter_trials(molecule: str, disease: str | None = None, limit: int = 15, page_size: int = PAGE_SIZE):
+	"""Async variant of :func:`iter_trials` on the shared httpx client."""
+	if not molecule:
+		return
+
+	remaining, page_token = limit, None
+	while remaining > 0:
+		params = _build_params(molecule, disease, min(page_size, remaining), page_token)
+		try:
+			data = await acached_json(
+				"clinicaltrials", params, lambda: async_get_json(API_URL, params=params, timeout=TIMEOUT)
+			)
+		except Exception:
+			return
+
+		for study in data.get("studies", [])[:remaining]:
+			remaining -= 1
+			yield _flatten_study(study)
+
+		page_token = data.get("nextPageToken")
+		if not page_token:
+			return
+
+
+def fetch_trials(molecule: str, disease: str | None = None, limit: int = 15):
+	return list(iter_trials(molecule, disease, limit))
+
 
-	try:
-		response = requests.get(API_URL, params=params, timeout=10)
-		data = response.json()
-		return data.get("StudyFieldsResponse", {}).get("StudyFields", [])
-	except Exception:
-		return []
+async def afetch_trials(molecule: str, disease: str | None = None, limit: int = 15):
+	"""Async variant of :func:`fetch_trials` on the shared httpx client."""
+	return [trial async for trial in aiter_trials(molecule, disease, limit)]
@@ -1,43 +1,56 @@
+"""PatentsView patent search with concurrent paging.
+
+The first page reports how many patents match; the remaining pages (up to the
+caller's limit) are then requested concurrently and their records yielded as
+pages arrive, deduplicated on patent number (or title) along the way. Only
+the fields the patent agent reads are requested, and each page is cached.
+"""
+
+import asyncio
 import json
-from typing import List, Dict
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List
 
-import requests
+from app.db.redis_cache import acached_json, cached_json
+from app.utils.http import async_get_json, get_json
 
 
 API_URL = "https://api.patentsview.org/patents/query"
 
+PAGE_SIZE = int(os.getenv("PATENT_PAGE_SIZE", "500"))
+PAGE_CONCURRENCY = int(os.getenv("PATENT_PAGE_CONCURRENCY", "4"))
+TIMEOUT = 10
+
+FIELDS = [
+	"patent_number",
+	"patent_title",
+	"patent_date",
+	"assignee_organization",
+	"assignee_last_name"
+]
 
-def fetch_patents(molecule: str, limit: int = 5) -> List[Dict[str, str]]:
-	"""Query the PatentsView API for patents mentioning the molecule."""
-	if not molecule:
-		return []
 
+def _build_params(molecule: str, per_page: int, page: int = 1) -> Dict[str, str]:
 	query = {
-		"_text_any": {
-			"patent_title": molecule
-		}
+		"_or": [
+			{"_text_any": {"patent_title": molecule}},
+			{"_text_any": {"patent_abstract": molecule}}
+		]
+	}
+
+	return {
+		"q": json.dumps(query),
+		"f": json.dumps(FIELDS),
+		# A stable sort keeps pages disjoint while they are fetched out of order.
+		"s": json.dumps([{"patent_number": "asc"}]),
+		"o": json.dumps({"page": page, "per_page": per_page})
 	}
 
-	try:
-		response = requests.get(
-			API_URL,
-			params={
-				"q": json.dumps(query),
-				"f": json.dumps([
-					"patent_number",
-					"patent_title",
-					"patent_date",
-					"assignees"
-				]),
-				"o": json.dumps({"page": 1, "per_page": limit})
-			},
-			timeout=10
-		)
-		payload = response.json()
-	except Exception:
-		return []
 
-	patents = payload.get("patents", [])
+def _parse_patents(payload: dict) -> List[Dict[str, str]]:
+	patents = payload.get("patents") or []
 	results: List[Dict[str, str]] = []
 	for patent in patents:
 		assignees = patent.get("assignees") or []
@@ -55,3 +68,123 @@ def fetch_patents(molecule: str, limit: int = 5) -> List[Dict[str, str]]:
 		})
 
 	return results
+
+
+def _get_page(molecule: str, per_page: int, page: int) -> dict:
+	params = _build_params(molecule, per_page, page)
+	return cached_json("patentsview", params, lambda: get_json(API_URL, params=params, timeout=TIMEOUT))
+
+
+async def _aget_page(molecule: str, per_page: int, page: int) -> dict:
+	params = _build_params(molecule, per_page, page)
+	return await acached_json("patentsview", params, lambda: async_get_json(API_URL, params=params, timeout=TIMEOUT))
+
+
+def _remaining_pages(payload: dict, limit: int, per_page: int) -> range:
+	total = min(int(payload.get("total_patent_count") or 0), limit)
+	return range(2, math.ceil(total / per_page) + 1)
+
+
+def _unique(patents: Iterable[Dict[str, str]], seen: set) -> Iterator[Dict[str, str]]:
+	for patent in patents:
+		key = patent.get("number") or patent.get("title")
+		if not key or key in seen:
+			continue
+		seen.add(key)
+		yield patent
+
+
+def iter_patents(
+	molecule: str,
+	limit: int = 5,
+	page_size: int = PAGE_SIZE,
+	concurrency: int = PAGE_CONCURRENCY
+) -> Iterator[Dict[str, str]]:
+	"""Yield up to ``limit`` distinct patents mentioning the molecule.
+
+	Pages after the first are fetched ``concurrency`` at a time and yielded in
+	page order; a failed page is skipped.
+	"""
+	if not molecule or limit <= 0:
+		return
+
+	per_page = min(page_size, limit)
+	try:
+		first = _get_page(molecule, per_page, 1)
+	except Exception:
+		return
+
+	seen: set = set()
+	yield from _unique(_parse_patents(first)[:limit], seen)
+
+	pages = _remaining_pages(first, limit, per_page)
+	if not pages:
+		return
+
+	def fetch_page(page: int) -> List[Dict[str, str]]:
+		try:
+			payload = _get_page(molecule, per_page, page)
+		except Exception:
+			return []
+		return _parse_patents(payload)
+
+	with ThreadPoolExecutor(max_workers=concurrency) as executor:
+		futures = [executor.submit(fetch_page, page) for page in pages]
+		try:
+			for page, future in zip(pages, futures):
+				room = limit - (page - 1) * per_page
+				yield from _unique(future.result()[:room], seen)
+		finally:
+			# A consumer that stops early should not wait for pages it will never read.
+			for future in futures:
+				future.cancel()
+
+
+async def aiter_patents(
+	molecule: str,
+	limit: int = 5,
+	page_size: int = PAGE_SIZE,
+	concurrency: int = PAGE_CONCURRENCY
+):
+	"""Async variant of :func:`iter_patents`; pages are yielded as they complete."""
+	if not molecule or limit <= 0:
+		return
+
+	per_page = min(page_size, limit)
+	try:
+		first = await _aget_page(molecule, per_page, 1)
+	except Exception:
+		return
+
+	seen: set = set()
+	for patent in _unique(_parse_patents(first)[:limit], seen):
+		yield patent
+
+	semaphore = asyncio.Semaphore(concurrency)
+
+	async def fetch_page(page: int) -> List[Dict[str, str]]:
+		async with semaphore:
+			try:
+				payload = await _aget_page(molecule, per_page, page)
+			except Exception:
+				return []
+		return _parse_patents(payload)[:limit - (page - 1) * per_page]
+
+	tasks = [asyncio.ensure_future(fetch_page(page)) for page in _remaining_pages(first, limit, per_page)]
+	try:
+		for next_done in asyncio.as_completed(tasks):
+			for patent in _unique(await next_done, seen):
+				yield patent
+	finally:
+		for task in tasks:
+			task.cancel()
+
+
+def fetch_patents(molecule: str, limit: int = 5) -> List[Dict[str, str]]:
+	"""Query the PatentsView API for patents mentioning the molecule."""
+	return list(iter_patents(molecule, limit))
+
+
+async def afetch_patents(molecule: str, limit: int = 5) -> List[Dict[str, str]]:
+	"""Async variant of :func:`fetch_patents` on the shared httpx client."""
+	return [patent async for patent in aiter_patents(molecule, limit)]
@@ -0,0 +1,185 @@
+"""PubMed access through NCBI E-utilities.
+
+esearch runs once with ``usehistory=y`` so the matching PMIDs stay on NCBI's
+History server; efetch then pages through them by ``WebEnv``/``query_key``
+instead of resending ID lists. Pages are requested lazily and parsed as they
+stream in, so a consumer that stops early skips the remaining pages. Search
+results and parsed pages go through the upstream cache.
+"""
+
+import os
+from contextlib import aclosing
+from datetime import datetime
+
+from app.db.redis_cache import acache_get, acache_set, acached_json, cache_get, cache_set, cached_json
+from app.utils.http import async_get_json, async_stream_get, get_json, stream_get
+from app.utils.parser import aiter_pubmed_articles, iter_pubmed_articles
+
+ESEARCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+EFETCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+
+# Sent with every E-utilities call when set; raises NCBI's limit from 3 to 10 requests/s.
+NCBI_API_KEY = os.getenv("NCBI_API_KEY")
+
+SEARCH_TIMEOUT = 5
+FETCH_TIMEOUT = 15
+# efetch serves up to 10,000 records per History-server page.
+PAGE_SIZE = 500
+MAX_RESULTS = 1000
+LOOKBACK_YEARS = 25
+
+
+def _with_api_key(params: dict) -> dict:
+	if NCBI_API_KEY:
+		params["api_key"] = NCBI_API_KEY
+	return params
+
+
+def _search_params(term: str) -> dict:
+	current_year = datetime.utcnow().year
+	return _with_api_key({
+		"db": "pubmed",
+		"term": term,
+		"usehistory": "y",
+		"retmax": 0,
+		"retmode": "json",
+		"datetype": "pdat",
+		"mindate": current_year - LOOKBACK_YEARS,
+		"maxdate": current_year
+	})
+
+
+def _parse_history(data: dict) -> dict | None:
+	result = data.get("esearchresult", {})
+	count = int(result.get("count") or 0)
+	if not count or not result.get("webenv") or not result.get("querykey"):
+		return None
+	return {
+		"count": count,
+		"webenv": result["webenv"],
+		"query_key": result["querykey"]
+	}
+
+
+def _page_params(history: dict, max_results: int, page_size: int) -> list[dict]:
+	total = min(history["count"], max_results)
+	return [
+		_with_api_key({
+			"db": "pubmed",
+			"WebEnv": history["webenv"],
+			"query_key": history["query_key"],
+			"retstart": start,
+			"retmax": min(page_size, total - start),
+			"retmode": "xml"
+		})
+		for start in range(0, total, page_size)
+	]
+
+
+def search(term: str, refresh: bool = False) -> dict | None:
+	"""Run esearch and return the History-server handle, or None when nothing matched."""
+	params = _search_params(term)
+	try:
+		data = cached_json(
+			"pubmed", params, lambda: get_json(ESEARCH_URL, params=params, timeout=SEARCH_TIMEOUT), refresh
+		)
+		return _parse_history(data)
+	except Exception:
+		return None
+
+
+async def asearch(term: str, refresh: bool = False) -> dict | None:
+	"""Async variant of :func:`search` on the shared httpx client."""
+	params = _search_params(term)
+	try:
+		data = await acached_json(
+			"pubmed", params, lambda: async_get_json(ESEARCH_URL, params=params, timeout=SEARCH_TIMEOUT), refresh
+		)
+		return _parse_history(data)
+	except Exception:
+		return None
+
+
+def _page_key(term: str, params: dict) -> dict:
+	# WebEnv/query_key are per-session handles; the page itself is term + window.
+	return {"efetch": term, "retstart": params["retstart"], "retmax": params["retmax"]}
+
+
+def _live_params(params: dict, history: dict) -> dict:
+	return {**params, "WebEnv": history["webenv"], "query_key": history["query_key"]}
+
+
+def iter_articles(term: str, max_results: int = MAX_RESULTS, page_size: int = PAGE_SIZE):
+	"""Yield article records (pmid, title, abstract, journal, year) matching ``term``.
+
+	Each page's records are cached as far as they were read, so a consumer
+	that stops at the same point next time never reaches NCBI. A page that
+	fails is skipped; the sweep carries on with the next one.
+	"""
+	history = search(term)
+	if history is None:
+		return
+
+	live = None
+	for params in _page_params(history, max_results, page_size):
+		key = _page_key(term, params)
+		cached = cache_get("pubmed", key) or {"records": [], "complete": False}
+		yield from cached["records"]
+		if cached["complete"]:
+			continue
+
+		if live is None:
+			# The cached search's WebEnv may have expired on NCBI's side.
+			live = search(term, refresh=True) or history
+		records, complete = list(cached["records"]), False
+		try:
+			body = stream_get(EFETCH_URL, params=_live_params(params, live), timeout=FETCH_TIMEOUT)
+			for index, record in enumerate(iter_pubmed_articles(body)):
+				if index >= len(cached["records"]):
+					records.append(record)
+					yield record
+			complete = True
+		except Exception:
+			continue
+		finally:
+			if complete or len(records) > len(cached["records"]):
+				cache_set("pubmed", key, {"records": records, "complete": complete})
+
+
+async def aiter_articles(term: str, max_results: int = MAX_RESULTS, page_size: int = PAGE_SIZE):
+	"""Async variant of :func:`iter_articles`.
+
+	Consume it inside ``contextlib.aclosing`` when breaking out early so the
+	open efetch response is released (and the page cached) straight away.
+	"""
+	history = await asearch(term)
+	if history is None:
+		return
+
+	live = None
+	for params in _page_params(history, max_results, page_size):
+		key = _page_key(term, params)
+		cached = await acache_get("pubmed", key) or {"records": [], "complete": False}
+		for record in cached["records"]:
+			yield record
+		if cached["complete"]:
+			continue
+
+		if live is None:
+			live = await asearch(term, refresh=True) or history
+		records, complete = list(cached["records"]), False
+		try:
+			body = async_stream_get(EFETCH_URL, params=_live_params(params, live), timeout=FETCH_TIMEOUT)
+			async with aclosing(body):
+				index = 0
+				async for record in aiter_pubmed_articles(body):
+					if index >= len(cached["records"]):
+						records.append(record)
+						yield record
+					index += 1
+			complete = True
+		except Exception:
+			continue
+		finally:
+			if complete or len(records) > len(cached["records"]):
+				await acache_set("pubmed", key, {"records": records, "complete": complete})
@@ -0,0 +1,44 @@
+"""Cooperative cancellation for graph work running in worker threads.
+
+``asyncio.wait_for`` cancels a coroutine but only abandons the thread behind
+an ``asyncio.to_thread`` call, which keeps fetching and prompting after its
+node has given up. :func:`cancellable` hands the block a flag that the threads
+it starts inherit (``to_thread`` copies the context). Once the flag is set, the
+next upstream request raises :class:`NodeCancelled` and ``get_llm()`` returns
+None, so the abandoned thread winds down instead of holding an executor slot.
+"""
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_cancel_flag: ContextVar = ContextVar("cancel_flag", default=None)
+
+
+class NodeCancelled(BaseException):
+    """Raised in a thread whose node stopped waiting for it.
+
+    Like ``asyncio.CancelledError`` it is not an ``Exception``, so agents'
+    broad fallbacks do not swallow it and circuit breakers do not count it.
+    """
+
+
+@contextmanager
+def cancellable():
+    """Yield a :class:`threading.Event`; setting it cancels work started inside the block."""
+    flag = threading.Event()
+    token = _cancel_flag.set(flag)
+    try:
+        yield flag
+    finally:
+        _cancel_flag.reset(token)
+
+
+def cancelled() -> bool:
+    flag = _cancel_flag.get()
+    return flag is not None and flag.is_set()
+
+
+def raise_if_cancelled():
+    if cancelled():
+        raise NodeCancelled()
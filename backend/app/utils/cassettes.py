@@ -0,0 +1,182 @@
+"""Record/replay of upstream traffic for offline benchmarks and load tests.
+
+``UPSTREAM_MODE`` selects what the HTTP layer does:
+
+* ``live`` (default): talk to the real upstreams.
+* ``record``: talk to the real upstreams and save every successful response
+  under ``CASSETTE_DIR/<host>/<key>.zst`` (zstd-compressed; the key is an
+  xxhash of method, host, path, sorted query and request body).
+* ``replay``: send every request to the stand-in at ``REPLAY_URL``
+  (``python -m app.replay``), which serves the cassettes back.
+
+Groq traffic is covered too: the chat model is given recording HTTP clients
+or pointed at the stand-in, depending on the mode.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+import xxhash
+import zstandard
+from requests.adapters import HTTPAdapter
+
+UPSTREAM_MODE = os.getenv("UPSTREAM_MODE", "live")
+CASSETTE_DIR = Path(os.getenv("CASSETTE_DIR", Path(__file__).resolve().parents[2] / "cassettes"))
+REPLAY_URL = os.getenv("REPLAY_URL", "http://127.0.0.1:8900").rstrip("/")
+
+# Never part of a key and never written to disk.
+SECRET_PARAMS = {"api_key"}
+
+_write_lock = threading.Lock()
+
+
+def recording() -> bool:
+    return UPSTREAM_MODE == "record"
+
+
+def replaying() -> bool:
+    return UPSTREAM_MODE == "replay"
+
+
+def _canonical_query(query: str) -> str:
+    pairs = parse_qsl(query, keep_blank_values=True)
+    return urlencode(sorted((key, value) for key, value in pairs if key not in SECRET_PARAMS))
+
+
+def cassette_key(method: str, host: str, path: str, query: str = "", body: bytes = b"") -> str:
+    digest = xxhash.xxh3_128()
+    digest.update(f"{method.upper()} {host}{path}?{_canonical_query(query)}\n".encode())
+    digest.update(body or b"")
+    return digest.hexdigest()
+
+
+def cassette_path(host: str, key: str) -> Path:
+    return CASSETTE_DIR / host / f"{key}.zst"
+
+
+def save_cassette(method: str, url: str, status: int, content_type: str | None,
+                  body: bytes, latency_s: float, request_body: bytes = b""):
+    parts = urlsplit(url)
+    key = cassette_key(method, parts.netloc, parts.path, parts.query, request_body)
+    meta = {
+        "method": method.upper(),
+        "url": urlunsplit(parts._replace(query=_canonical_query(parts.query))),
+        "status": status,
+        "content_type": content_type,
+        "latency_ms": round(latency_s * 1000, 1),
+        "recorded_at": time.time()
+    }
+    frame = json.dumps(meta).encode() + b"\n" + body
+    path = cassette_path(parts.netloc, key)
+    with _write_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(zstandard.ZstdCompressor(level=10).compress(frame))
+
+
+def load_cassette(method: str, host: str, path: str, query: str = "", body: bytes = b"") -> tuple[dict, bytes] | None:
+    """Return ``(meta, body)`` for a recorded request, or None."""
+    file = cassette_path(host, cassette_key(method, host, path, query, body))
+    if not file.exists():
+        return None
+    frame = zstandard.ZstdDecompressor().decompress(file.read_bytes())
+    header, _, content = frame.partition(b"\n")
+    return json.loads(header), content
+
+
+def upstream_url(url: str) -> str:
+    """In replay mode, point ``url`` at the stand-in (``REPLAY_URL/<host>/<path>``)."""
+    if not replaying():
+        return url
+    parts = urlsplit(url)
+    return f"{REPLAY_URL}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+
+
+def llm_client_options() -> dict:
+    """Extra ChatGroq arguments that route LLM calls through record/replay."""
+    if recording():
+        return {
+            "http_client": httpx.Client(transport=RecordingTransport()),
+            "http_async_client": httpx.AsyncClient(transport=AsyncRecordingTransport())
+        }
+    if replaying():
+        return {"groq_api_base": f"{REPLAY_URL}/api.groq.com"}
+    return {}
+
+
+def _recordable(status: int) -> bool:
+    return status < 500 and status != 429
+
+
+class RecordingAdapter(HTTPAdapter):
+    """requests adapter that saves every decoded response as a cassette."""
+
+    def send(self, request, **kwargs):
+        started = time.perf_counter()
+        response = super().send(request, **kwargs)
+        # Reading here buffers streamed bodies, which is acceptable while recording.
+        content = response.content
+        if _recordable(response.status_code):
+            save_cassette(
+                request.method, request.url, response.status_code,
+                response.headers.get("Content-Type"), content,
+                time.perf_counter() - started, request.body or b""
+            )
+        return response
+
+
+def _rebuilt(response: httpx.Response, request: httpx.Request, content: bytes) -> httpx.Response:
+    # The body is already decoded, so drop the headers that describe the wire form.
+    headers = [
+        (name, value) for name, value in response.headers.multi_items()
+        if name.lower() not in {"content-encoding", "content-length", "transfer-encoding"}
+    ]
+    return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+
+class RecordingTransport(httpx.BaseTransport):
+    def __init__(self, transport: httpx.BaseTransport | None = None):
+        self._transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        response = self._transport.handle_request(request)
+        content = httpx.Response(
+            response.status_code, headers=response.headers, stream=response.stream
+        ).read()
+        if _recordable(response.status_code):
+            save_cassette(
+                request.method, str(request.url), response.status_code,
+                response.headers.get("Content-Type"), content,
+                time.perf_counter() - started, request.content
+            )
+        return _rebuilt(response, request, content)
+
+    def close(self):
+        self._transport.close()
+
+
+class AsyncRecordingTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncBaseTransport | None = None):
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self._transport.handle_async_request(request)
+        content = await httpx.Response(
+            response.status_code, headers=response.headers, stream=response.stream
+        ).aread()
+        if _recordable(response.status_code):
+            save_cassette(
+                request.method, str(request.url), response.status_code,
+                response.headers.get("Content-Type"), content,
+                time.perf_counter() - started, request.content
+            )
+        return _rebuilt(response, request, content)
+
+    async def aclose(self):
+        await self._transport.aclose()
@@ -0,0 +1,149 @@
+"""Circuit breakers for the upstream APIs and the LLM provider.
+
+A breaker starts ``closed``. After ``BREAKER_FAILURE_THRESHOLD`` consecutive
+failed calls it turns ``open`` and rejects calls straight away with
+:class:`CircuitOpenError`, which the services and agents already treat like
+any other upstream failure, so they take their fallbacks in microseconds.
+After ``BREAKER_RESET_SECONDS`` it turns ``half_open`` and lets one trial call
+through: success closes it, failure opens it again.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+UPSTREAM_HOSTS = {
+    "eutils.ncbi.nlm.nih.gov": "pubmed",
+    "clinicaltrials.gov": "clinicaltrials",
+    "api.patentsview.org": "patentsview",
+}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_seconds: float = BREAKER_RESET_SECONDS
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+            self._state = HALF_OPEN
+        return self._state
+
+    def is_open(self) -> bool:
+        """True while calls would be rejected; does not use up the half-open trial."""
+        with self._lock:
+            state = self._current_state()
+            return state == OPEN or (state == HALF_OPEN and self._trial_in_flight)
+
+    def before_call(self):
+        with self._lock:
+            state = self._current_state()
+            if state == OPEN or (state == HALF_OPEN and self._trial_in_flight):
+                self._rejected += 1
+                raise CircuitOpenError(f"{self.name} circuit is open")
+            if state == HALF_OPEN:
+                self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release(self):
+        """Forget an abandoned call (e.g. cancelled by the latency budget)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                "rejected_calls": self._rejected
+            }
+
+
+_breakers: dict = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(name, CircuitBreaker(name))
+    return breaker
+
+
+def breaker_for_url(url: str) -> CircuitBreaker | None:
+    name = UPSTREAM_HOSTS.get(urlsplit(url).hostname)
+    return get_breaker(name) if name else None
+
+
+@contextmanager
+def guarded(breaker: CircuitBreaker | None, is_failure=lambda exc: True):
+    """Run the block under ``breaker``; ``is_failure`` decides which exceptions trip it.
+
+    Exceptions that are not failures (e.g. a 404) still prove the upstream is
+    up and count as success; cancellation neither trips nor heals the breaker.
+    """
+    if breaker is None:
+        yield
+        return
+
+    breaker.before_call()
+    try:
+        yield
+    except Exception as exc:
+        if is_failure(exc):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        raise
+    except BaseException:
+        breaker.release()
+        raise
+    breaker.record_success()
+
+
+def circuit_breaker_metrics() -> dict:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
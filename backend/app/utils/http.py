@@ -1,17 +1,364 @@
+"""Shared HTTP layer for every upstream service.
+
+One pooled ``requests.Session`` (sync path) and one ``httpx.AsyncClient`` per
+event loop (async path) keep TCP/TLS connections alive between calls. Both
+retry transport errors, 429s and 5xx responses with jittered exponential
+backoff, cap concurrent connections per upstream host, and advertise
+gzip/br so payloads are decoded transparently (``brotli`` provides br).
+Every attempt first checks that its graph node still wants the answer (see
+``app/utils/cancellation.py``), then waits for its host's rate-limit token (see
+``app/utils/rate_limit.py``), and a call whose retries are exhausted counts
+against the host's circuit breaker (``app/utils/circuit_breaker.py``).
+Timeouts adapt to each endpoint's observed latency and slow async requests
+can be hedged (``app/utils/latency.py``). ``UPSTREAM_MODE`` switches the whole
+layer to recording or replaying cassettes (``app/utils/cassettes.py``). In
+replay only the request itself goes to the stand-in: limits, breakers, host
+slots and latency windows stay keyed on the real upstream URL.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from tenacity import (
+    AsyncRetrying,
+    Retrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+from app.utils.cancellation import raise_if_cancelled
+from app.utils.cassettes import AsyncRecordingTransport, RecordingAdapter, recording, upstream_url
+from app.utils.circuit_breaker import breaker_for_url, guarded
+from app.utils.latency import (
+    endpoint_of,
+    hedge_delay,
+    record_hedge,
+    record_latency,
+    record_timeout,
+    timeout_for,
+)
+from app.utils.rate_limit import aacquire, acquire
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (research-bot)",
+    "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate, br"
+}
+
+DEFAULT_TIMEOUT = 10
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "200"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "20"))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "30"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF_SECONDS = float(os.getenv("HTTP_BACKOFF_SECONDS", "0.5"))
+HTTP_BACKOFF_MAX_SECONDS = float(os.getenv("HTTP_BACKOFF_MAX_SECONDS", "4"))
+STREAM_CHUNK_SIZE = 64 * 1024
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+
+_async_client = None
+_async_client_loop = None
+_host_slots: dict = {}
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout, httpx.TransportError)):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code in RETRY_STATUSES
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRY_STATUSES
+    return False
+
+
+def _retry_policy() -> dict:
+    return {
+        "retry": retry_if_exception(_is_retryable),
+        "stop": stop_after_attempt(HTTP_RETRIES + 1),
+        "wait": wait_random_exponential(multiplier=HTTP_BACKOFF_SECONDS, max=HTTP_BACKOFF_MAX_SECONDS),
+        "reraise": True
+    }
+
+
+def _observe(endpoint: str, started: float, response):
+    # Fast 5xx answers say nothing about how long a good response takes.
+    if response.status_code < 500:
+        record_latency(endpoint, time.perf_counter() - started)
+
+
+def _is_timeout(exc: BaseException) -> bool:
+    # A pool timeout is local queueing, not the upstream being slow.
+    if isinstance(exc, httpx.PoolTimeout):
+        return False
+    return isinstance(exc, (requests.Timeout, httpx.TimeoutException))
+
+
+def _timed_get(endpoint: str, timeout: float, send) -> requests.Response:
+    started = time.perf_counter()
+    try:
+        response = send()
+    except Exception as exc:
+        if _is_timeout(exc):
+            record_timeout(endpoint, timeout)
+        raise
+    _observe(endpoint, started, response)
+    return response
+
+
+def _answered(response) -> bool:
+    return response.status_code < 500 and response.status_code not in RETRY_STATUSES
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled Session used by the sync request path.
+
+    ``pool_block`` makes threads wait for a free connection once a host has
+    ``HTTP_MAX_CONNECTIONS_PER_HOST`` open, which is the per-host limit.
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter_cls = RecordingAdapter if recording() else HTTPAdapter
+                adapter = adapter_cls(
+                    pool_connections=16,
+                    pool_maxsize=HTTP_MAX_CONNECTIONS_PER_HOST,
+                    pool_block=True
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update(DEFAULT_HEADERS)
+                _session = session
+    return _session
+
+
+def http_get(url, params=None, timeout=DEFAULT_TIMEOUT) -> requests.Response:
+    """GET through the pooled Session with retries; raises on transport or HTTP errors."""
+    target = upstream_url(url)
+    endpoint = endpoint_of(url)
+    timeout = timeout_for(endpoint, timeout)
+    with guarded(breaker_for_url(url), _is_retryable):
+        for attempt in Retrying(**_retry_policy()):
+            with attempt:
+                raise_if_cancelled()
+                acquire(url)
+                response = _timed_get(
+                    endpoint, timeout, lambda: get_session().get(target, params=params, timeout=timeout)
+                )
+                response.raise_for_status()
+    return response
+
+
+def get_json(url, params=None, timeout=DEFAULT_TIMEOUT):
+    return http_get(url, params=params, timeout=timeout).json()
+
+
+def stream_get(url, params=None, timeout=DEFAULT_TIMEOUT, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield the decoded response body in chunks instead of buffering it.
+
+    Only establishing the response is retried; once bytes have been handed to
+    the caller a failure propagates.
+    """
+    target = upstream_url(url)
+    endpoint = endpoint_of(url)
+    timeout = timeout_for(endpoint, timeout)
+    with guarded(breaker_for_url(url), _is_retryable):
+        for attempt in Retrying(**_retry_policy()):
+            with attempt:
+                raise_if_cancelled()
+                acquire(url)
+                response = _timed_get(
+                    endpoint, timeout, lambda: get_session().get(target, params=params, timeout=timeout, stream=True)
+                )
+                try:
+                    response.raise_for_status()
+                except Exception:
+                    response.close()
+                    raise
+    with response:
+        yield from response.iter_content(chunk_size=chunk_size)
+
+
 def safe_get_json(url, params=None):
     try:
-        res = requests.get(
-            url,
-            params=params,
-            timeout=10,
-            headers={
-                "User-Agent": "Mozilla/5.0 (research-bot)",
-                "Accept": "application/json"
-            }
-        )
-        if res.status_code != 200:
-            return {}
-        return res.json()
+        return get_json(url, params=params)
     except Exception:
         return {}
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the process-wide AsyncClient for the running event loop.
+
+    httpx clients are bound to the loop that opened their connections, so a
+    new client is created if the caller runs on a different loop (scripts that
+    call ``asyncio.run`` repeatedly).
+    """
+    global _async_client, _async_client_loop
+
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client.is_closed or _async_client_loop is not loop:
+        limits = httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_SECONDS
+        )
+        transport = None
+        if recording():
+            transport = AsyncRecordingTransport(httpx.AsyncHTTPTransport(limits=limits))
+        _async_client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            follow_redirects=True,
+            limits=limits,
+            transport=transport
+        )
+        _async_client_loop = loop
+        _host_slots.clear()
+    return _async_client
+
+
+async def close_async_client():
+    global _async_client, _async_client_loop
+
+    if _async_client is not None and not _async_client.is_closed:
+        await _async_client.aclose()
+    _async_client = None
+    _async_client_loop = None
+    _host_slots.clear()
+
+
+def _host_slot(url: str) -> asyncio.Semaphore:
+    # httpx only limits connections globally; this caps each upstream host.
+    host = urlsplit(url).netloc
+    slot = _host_slots.get(host)
+    if slot is None:
+        slot = _host_slots[host] = asyncio.Semaphore(HTTP_MAX_CONNECTIONS_PER_HOST)
+    return slot
+
+
+async def _timed(endpoint: str, timeout: float, send) -> httpx.Response:
+    started = time.perf_counter()
+    try:
+        response = await send()
+    except Exception as exc:
+        if _is_timeout(exc):
+            record_timeout(endpoint, timeout)
+        raise
+    _observe(endpoint, started, response)
+    return response
+
+
+def _won(task: asyncio.Future) -> bool:
+    return not task.cancelled() and task.exception() is None and _answered(task.result())
+
+
+async def _hedged(url: str, timeout: float, send) -> httpx.Response:
+    """Await ``send()``; once it outlives the endpoint's p95, race one duplicate.
+
+    The first good response wins and the other request is cancelled (or
+    closed if it also completed). A 5xx or 429 is a loss, not a win. If
+    neither request answers well, the original request's outcome is returned
+    or raised.
+    """
+    endpoint = endpoint_of(url)
+    delay = hedge_delay(endpoint)
+    if delay is None:
+        return await _timed(endpoint, timeout, send)
+
+    async def duplicate():
+        await aacquire(url)
+        return await _timed(endpoint, timeout, send)
+
+    tasks = [asyncio.ensure_future(_timed(endpoint, timeout, send))]
+    winner = None
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            record_hedge(endpoint)
+            tasks.append(asyncio.ensure_future(duplicate()))
+
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if _won(task):
+                    winner = task
+                    return task.result()
+        winner = tasks[0]
+        return await tasks[0]
+    finally:
+        for task in tasks:
+            if task is winner:
+                continue
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled() and task.exception() is None:
+                await task.result().aclose()
+
+
+async def async_get(url, params=None, timeout=DEFAULT_TIMEOUT) -> httpx.Response:
+    """GET through the shared AsyncClient with retries; raises on transport or HTTP errors."""
+    target = upstream_url(url)
+    client = get_async_client()
+    timeout = timeout_for(endpoint_of(url), timeout)
+
+    async def send():
+        async with _host_slot(url):
+            return await client.get(target, params=params, timeout=timeout)
+
+    with guarded(breaker_for_url(url), _is_retryable):
+        async for attempt in AsyncRetrying(**_retry_policy()):
+            with attempt:
+                raise_if_cancelled()
+                await aacquire(url)
+                response = await _hedged(url, timeout, send)
+                response.raise_for_status()
+    return response
+
+
+async def async_get_json(url, params=None, timeout=DEFAULT_TIMEOUT):
+    response = await async_get(url, params=params, timeout=timeout)
+    return response.json()
+
+
+async def async_stream_get(url, params=None, timeout=DEFAULT_TIMEOUT, chunk_size=STREAM_CHUNK_SIZE):
+    """Async variant of :func:`stream_get`; holds a host slot until the body is consumed."""
+    target = upstream_url(url)
+    client = get_async_client()
+    timeout = timeout_for(endpoint_of(url), timeout)
+
+    async def send():
+        # Runs under the slot held below; a hedged duplicate shares it rather
+        # than waiting for a second one behind the request it is hedging.
+        request = client.build_request("GET", target, params=params, timeout=timeout)
+        return await client.send(request, stream=True)
+
+    async with _host_slot(url):
+        with guarded(breaker_for_url(url), _is_retryable):
+            async for attempt in AsyncRetrying(**_retry_policy()):
+                with attempt:
+                    raise_if_cancelled()
+                    await aacquire(url)
+                    response = await _hedged(url, timeout, send)
+                    try:
+                        response.raise_for_status()
+                    except Exception:
+                        await response.aclose()
+                        raise
+        try:
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+        finally:
+            await response.aclose()
@@ -0,0 +1,127 @@
+"""Rolling per-endpoint latency windows for adaptive timeouts and hedging.
+
+Every successful upstream call records how long the response took to arrive
+(headers, for streamed bodies) under its ``host/path`` endpoint. A call that
+times out records its timeout instead: a censored sample (the real latency was
+at least that long), so an endpoint that slows down raises its p99 and its
+timeout rather than timing out forever against a stale one. Once an endpoint
+has ``HTTP_LATENCY_MIN_SAMPLES`` observations:
+
+* its timeout becomes ``HTTP_TIMEOUT_MULTIPLIER`` x the observed p99, clamped
+  to ``[HTTP_TIMEOUT_MIN_SECONDS, HTTP_TIMEOUT_MAX_SECONDS]``, instead of the
+  caller's fixed value (which remains the cold-start default);
+* with ``HTTP_HEDGE_ENABLED`` a request still pending after the observed p95
+  gets a duplicate, and whichever answers first is used.
+"""
+
+import os
+import threading
+from collections import deque
+from urllib.parse import urlsplit
+
+HTTP_ADAPTIVE_TIMEOUTS = os.getenv("HTTP_ADAPTIVE_TIMEOUTS", "true").lower() in {"1", "true", "yes"}
+HTTP_HEDGE_ENABLED = os.getenv("HTTP_HEDGE_ENABLED", "false").lower() in {"1", "true", "yes"}
+HTTP_LATENCY_WINDOW = int(os.getenv("HTTP_LATENCY_WINDOW", "200"))
+HTTP_LATENCY_MIN_SAMPLES = int(os.getenv("HTTP_LATENCY_MIN_SAMPLES", "20"))
+HTTP_TIMEOUT_MULTIPLIER = float(os.getenv("HTTP_TIMEOUT_MULTIPLIER", "3"))
+HTTP_TIMEOUT_MIN_SECONDS = float(os.getenv("HTTP_TIMEOUT_MIN_SECONDS", "1"))
+HTTP_TIMEOUT_MAX_SECONDS = float(os.getenv("HTTP_TIMEOUT_MAX_SECONDS", "60"))
+
+
+class LatencyWindow:
+    """The last ``size`` latencies of one endpoint, in seconds."""
+
+    def __init__(self, size: int = HTTP_LATENCY_WINDOW):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.hedges = 0
+        self.timeouts = 0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def quantiles(self, *points: float) -> list[float]:
+        with self._lock:
+            ordered = sorted(self._samples)
+        if not ordered:
+            return [0.0 for _ in points]
+        return [ordered[min(int(point * len(ordered)), len(ordered) - 1)] for point in points]
+
+
+_windows: dict = {}
+_windows_lock = threading.Lock()
+
+
+def endpoint_of(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.netloc}{parts.path}"
+
+
+def _window(endpoint: str) -> LatencyWindow:
+    window = _windows.get(endpoint)
+    if window is None:
+        with _windows_lock:
+            window = _windows.setdefault(endpoint, LatencyWindow())
+    return window
+
+
+def record_latency(endpoint: str, seconds: float):
+    _window(endpoint).record(seconds)
+
+
+def record_timeout(endpoint: str, seconds: float):
+    window = _window(endpoint)
+    window.record(seconds)
+    window.timeouts += 1
+
+
+def record_hedge(endpoint: str):
+    _window(endpoint).hedges += 1
+
+
+def _warm(endpoint: str) -> LatencyWindow | None:
+    window = _windows.get(endpoint)
+    if window is None or len(window) < HTTP_LATENCY_MIN_SAMPLES:
+        return None
+    return window
+
+
+def timeout_for(endpoint: str, default: float) -> float:
+    """Timeout derived from the endpoint's p99, or ``default`` until enough samples exist."""
+    window = _warm(endpoint) if HTTP_ADAPTIVE_TIMEOUTS else None
+    if window is None:
+        return default
+    (p99,) = window.quantiles(0.99)
+    return min(max(p99 * HTTP_TIMEOUT_MULTIPLIER, HTTP_TIMEOUT_MIN_SECONDS), HTTP_TIMEOUT_MAX_SECONDS)
+
+
+def hedge_delay(endpoint: str) -> float | None:
+    """Seconds after which to send a hedged duplicate (the p95), or None to not hedge."""
+    window = _warm(endpoint) if HTTP_HEDGE_ENABLED else None
+    if window is None:
+        return None
+    (p95,) = window.quantiles(0.95)
+    return p95
+
+
+def latency_metrics() -> dict:
+    with _windows_lock:
+        windows = dict(_windows)
+
+    metrics = {}
+    for endpoint, window in windows.items():
+        p50, p95, p99 = window.quantiles(0.5, 0.95, 0.99)
+        metrics[endpoint] = {
+            "samples": len(window),
+            "p50_seconds": round(p50, 4),
+            "p95_seconds": round(p95, 4),
+            "p99_seconds": round(p99, 4),
+            "timeout_seconds": round(timeout_for(endpoint, 0.0), 3) or None,
+            "hedged_requests": window.hedges,
+            "timeouts": window.timeouts
+        }
+    return metrics
@@ -0,0 +1,77 @@
+"""Incremental parsers for upstream payloads."""
+
+import xml.etree.ElementTree as ET
+from typing import AsyncIterable, Iterable, Iterator
+
+
+def _article_record(entry: ET.Element) -> dict | None:
+    pmid = entry.findtext("MedlineCitation/PMID")
+    article = entry.find("MedlineCitation/Article")
+    if not pmid or article is None:
+        return None
+
+    year = article.findtext(".//PubDate/Year")
+    return {
+        "pmid": pmid,
+        "title": article.findtext("ArticleTitle", ""),
+        "abstract": " ".join([
+            a.text or "" for a in article.findall(".//AbstractText")
+        ]),
+        "journal": article.findtext(".//Journal/Title", ""),
+        "year": int(year) if year and year.isdigit() else None
+    }
+
+
+class PubmedArticleParser:
+    """Push parser for an efetch ``PubmedArticleSet`` fed with raw bytes.
+
+    Each ``PubmedArticle`` is turned into a compact record as soon as its end
+    tag arrives and the partial tree is then cleared, so peak memory is bounded
+    by one article plus the current network chunk, whatever the response size.
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._root = None
+
+    def feed(self, data: bytes) -> list[dict]:
+        self._parser.feed(data)
+        return self._drain()
+
+    def close(self) -> list[dict]:
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self) -> list[dict]:
+        records = []
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = element
+                continue
+            if element.tag != "PubmedArticle":
+                continue
+            record = _article_record(element)
+            if record:
+                records.append(record)
+            # Drop the finished article (and any siblings kept so far).
+            self._root.clear()
+        return records
+
+
+def iter_pubmed_articles(chunks: Iterable[bytes]) -> Iterator[dict]:
+    """Yield article records from an efetch XML byte stream."""
+    parser = PubmedArticleParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+async def aiter_pubmed_articles(chunks: AsyncIterable[bytes]):
+    """Async variant of :func:`iter_pubmed_articles`."""
+    parser = PubmedArticleParser()
+    async for chunk in chunks:
+        for record in parser.feed(chunk):
+            yield record
+    for record in parser.close():
+        yield record
@@ -0,0 +1,253 @@
+"""Token-bucket rate limiting per upstream host.
+
+Every outbound request takes a token from its host's bucket before it is sent.
+When the bucket is empty the request is not rejected: it reserves the next
+token and sleeps until that token is due, so callers queue in arrival order.
+A waiter that is cancelled gives its token back.
+The ``memory`` backend keeps buckets in this process; the ``redis`` backend
+keeps them in Redis (one atomic Lua call per request) so every uvicorn worker
+and job worker shares the upstream's budget.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+from app.db.redis_cache import get_async_redis, get_redis
+from app.utils.circuit_breaker import get_breaker, guarded
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+NCBI_API_KEY = os.getenv("NCBI_API_KEY")
+
+# host -> (tokens per second, burst). Hosts not listed are not limited.
+UPSTREAM_RATES = {
+    # NCBI: 3 requests/s without an API key, 10 with one.
+    "eutils.ncbi.nlm.nih.gov": (10.0, 10) if NCBI_API_KEY else (3.0, 3),
+    # ClinicalTrials.gov: about 50 requests/min per IP.
+    "clinicaltrials.gov": (50 / 60, 5),
+    # PatentsView: 45 requests/min.
+    "api.patentsview.org": (45 / 60, 5),
+}
+
+# Returns the seconds the caller must wait for its reserved token.
+RESERVE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(now - ts, 0) * rate) - 1
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil((burst - tokens) / rate) + 1)
+if tokens >= 0 then
+    return '0'
+end
+return tostring(-tokens / rate)
+"""
+
+# Gives back a reservation whose caller stopped waiting.
+REFUND_SCRIPT = """
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+if tokens then
+    redis.call('HSET', KEYS[1], 'tokens', tostring(math.min(tonumber(ARGV[1]), tokens + 1)))
+end
+return 1
+"""
+
+# The same breaker the response cache uses, so one Redis outage opens it for both.
+_redis_breaker = get_breaker("redis")
+
+
+class TokenBucket:
+    """Thread-safe bucket that hands out reservations instead of refusals."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate) - 1
+            self._updated = now
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def refund(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+
+class InMemoryRateLimiter:
+    """Buckets held in this process; each worker process gets the full rate."""
+
+    def __init__(self):
+        self._buckets: dict = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host: str, rate: float, burst: int) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.setdefault(host, TokenBucket(rate, burst))
+        return bucket
+
+    def reserve(self, host: str, rate: float, burst: int) -> float:
+        return self._bucket(host, rate, burst).reserve()
+
+    async def areserve(self, host: str, rate: float, burst: int) -> float:
+        return self.reserve(host, rate, burst)
+
+    def refund(self, host: str, rate: float, burst: int):
+        self._bucket(host, rate, burst).refund()
+
+    async def arefund(self, host: str, rate: float, burst: int):
+        self.refund(host, rate, burst)
+
+
+class RedisRateLimiter:
+    """Buckets stored in Redis and shared by every process using ``REDIS_URL``.
+
+    If Redis cannot be reached the in-process buckets take over, so an outage
+    loosens coordination instead of failing upstream calls.
+    """
+
+    def __init__(self):
+        self._local = InMemoryRateLimiter()
+        self._scripts: dict = {}
+
+    def _key(self, host: str) -> str:
+        return f"ratelimit:{host}"
+
+    def _script(self, client, source: str):
+        # Registered once per client; redis-py loads it again after a NOSCRIPT.
+        script = self._scripts.get(source)
+        if script is None or script.registered_client is not client:
+            script = self._scripts[source] = client.register_script(source)
+        return script
+
+    def reserve(self, host: str, rate: float, burst: int) -> float:
+        try:
+            with guarded(_redis_breaker):
+                script = self._script(get_redis(), RESERVE_SCRIPT)
+                return float(script(keys=[self._key(host)], args=[rate, burst]))
+        except Exception:
+            return self._local.reserve(host, rate, burst)
+
+    async def areserve(self, host: str, rate: float, burst: int) -> float:
+        try:
+            with guarded(_redis_breaker):
+                script = self._script(get_async_redis(), RESERVE_SCRIPT)
+                return float(await script(keys=[self._key(host)], args=[rate, burst]))
+        except Exception:
+            return self._local.reserve(host, rate, burst)
+
+    def refund(self, host: str, rate: float, burst: int):
+        try:
+            with guarded(_redis_breaker):
+                self._script(get_redis(), REFUND_SCRIPT)(keys=[self._key(host)], args=[burst])
+        except Exception:
+            self._local.refund(host, rate, burst)
+
+    async def arefund(self, host: str, rate: float, burst: int):
+        try:
+            with guarded(_redis_breaker):
+                script = self._script(get_async_redis(), REFUND_SCRIPT)
+                await script(keys=[self._key(host)], args=[burst])
+        except Exception:
+            self._local.refund(host, rate, burst)
+
+
+RATE_LIMITERS = {
+    "memory": InMemoryRateLimiter,
+    "redis": RedisRateLimiter,
+}
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+_wait_stats: dict = {}
+_wait_stats_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    global _limiter
+
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                limiter_cls = RATE_LIMITERS.get(RATE_LIMIT_BACKEND)
+                if limiter_cls is None:
+                    raise ValueError(f"Unknown RATE_LIMIT_BACKEND {RATE_LIMIT_BACKEND!r}")
+                _limiter = limiter_cls()
+    return _limiter
+
+
+def _record_wait(host: str, waited: float):
+    with _wait_stats_lock:
+        stats = _wait_stats.setdefault(host, {
+            "requests": 0,
+            "queued": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0
+        })
+        stats["requests"] += 1
+        if waited > 0:
+            stats["queued"] += 1
+            stats["wait_seconds_total"] += waited
+            stats["wait_seconds_max"] = max(stats["wait_seconds_max"], waited)
+
+
+def rate_limit_metrics() -> dict:
+    """Per-host request counts and queue wait times for this process."""
+    with _wait_stats_lock:
+        return {
+            host: {
+                **stats,
+                "wait_seconds_total": round(stats["wait_seconds_total"], 3),
+                "wait_seconds_max": round(stats["wait_seconds_max"], 3),
+                "wait_seconds_mean": round(stats["wait_seconds_total"] / max(stats["requests"], 1), 4)
+            }
+            for host, stats in _wait_stats.items()
+        }
+
+
+def acquire(url: str) -> float:
+    """Block until ``url``'s host may be called; returns the seconds spent queued."""
+    host = urlsplit(url).hostname
+    if host not in UPSTREAM_RATES:
+        return 0.0
+    limiter = get_rate_limiter()
+    delay = limiter.reserve(host, *UPSTREAM_RATES[host])
+    if delay > 0:
+        try:
+            time.sleep(delay)
+        except BaseException:
+            limiter.refund(host, *UPSTREAM_RATES[host])
+            raise
+    _record_wait(host, delay)
+    return delay
+
+
+async def aacquire(url: str) -> float:
+    """Async variant of :func:`acquire`; waits without blocking the event loop."""
+    host = urlsplit(url).hostname
+    if host not in UPSTREAM_RATES:
+        return 0.0
+    limiter = get_rate_limiter()
+    delay = await limiter.areserve(host, *UPSTREAM_RATES[host])
+    if delay > 0:
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            # A refund is one quick call; shield it so the cancellation cannot skip it.
+            await asyncio.shield(limiter.arefund(host, *UPSTREAM_RATES[host]))
+            raise
+    _record_wait(host, delay)
+    return delay
@@ -1,14 +1,117 @@
 from __future__ import annotations
 
+import asyncio
+import os
+import threading
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from typing import Iterable
 
 from app.core.llm_provider import get_llm
+from app.core.llm_usage import current_caller
 
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
 
-def summarize_with_llm(topic: str, facts: Iterable[str], fallback: str) -> str:
+_collector: ContextVar = ContextVar("summary_collector", default=None)
+
+
+class PendingSummary:
+    """Stand-in for a summary that the request's collector is still writing."""
+
+    def __init__(self, index: int):
+        self.index = index
+
+
+class SummaryCollector:
+    """Run one request's summary prompts concurrently instead of inside each agent.
+
+    Agents get a :class:`PendingSummary` back straight away. The prompt starts
+    at once on the request's event loop (at most ``concurrency`` in flight), so
+    summaries overlap with the rest of the graph. :meth:`resolve` swaps the
+    placeholders for the finished text.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, concurrency: int = SUMMARY_CONCURRENCY):
+        self._loop = loop
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._futures: list = []
+        self._fallbacks: list[str] = []
+        self._nodes: list = []
+        self._lock = threading.Lock()
+        self.timed_out_nodes: list[str] = []
+
+    def defer(self, llm, prompt: str, fallback: str) -> PendingSummary:
+        # Agents mostly run in worker threads (asyncio.to_thread).
+        future = asyncio.run_coroutine_threadsafe(self._complete(llm, prompt, fallback), self._loop)
+        with self._lock:
+            self._futures.append(future)
+            self._fallbacks.append(fallback)
+            self._nodes.append(current_caller() or "summaries")
+            return PendingSummary(len(self._futures) - 1)
+
+    async def _complete(self, llm, prompt: str, fallback: str) -> str:
+        async with self._semaphore:
+            try:
+                response = await llm.ainvoke(prompt)
+                return (response.content or "").strip() or fallback
+            except Exception:
+                return fallback
+
+    async def resolve(self, value, timeout: float | None = None):
+        """Return ``value`` with every placeholder replaced by its summary.
+
+        Summaries still running after ``timeout`` seconds keep their fallback text.
+        """
+        with self._lock:
+            futures, fallbacks, nodes = list(self._futures), list(self._fallbacks), list(self._nodes)
+        texts = list(fallbacks)
+        timed_out = set()
+        if futures:
+            pending = [asyncio.wrap_future(future) for future in futures]
+            await asyncio.wait(pending, timeout=timeout)
+            for index, future in enumerate(pending):
+                if future.done() and not future.cancelled():
+                    texts[index] = future.result()
+                else:
+                    future.cancel()
+                    timed_out.add(nodes[index])
+        self.timed_out_nodes = sorted(timed_out)
+        return _substitute(value, texts)
+
+    def cancel(self):
+        with self._lock:
+            for future in self._futures:
+                future.cancel()
+
+
+def _substitute(value, texts: list[str]):
+    if isinstance(value, PendingSummary):
+        return texts[value.index]
+    if isinstance(value, dict):
+        return {key: _substitute(item, texts) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_substitute(item, texts) for item in value]
+    return value
+
+
+@asynccontextmanager
+async def collecting_summaries(concurrency: int = SUMMARY_CONCURRENCY):
+    """Defer :func:`summarize_with_llm` calls made inside the block to one collector."""
+    collector = SummaryCollector(asyncio.get_running_loop(), concurrency)
+    token = _collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _collector.reset(token)
+        collector.cancel()
+
+
+def summarize_with_llm(topic: str, facts: Iterable[str], fallback: str) -> str | PendingSummary:
     """Use the Groq LLM to summarize structured facts.
 
     Returns the fallback summary when the LLM is unavailable or facts are empty.
+    Inside :func:`collecting_summaries` it returns a :class:`PendingSummary`
+    that the collector resolves once the whole request is done.
     """
 
     fact_list = [f.strip() for f in facts if f and f.strip()]
@@ -26,6 +129,10 @@ Facts:
 {chr(10).join(f'- {fact}' for fact in fact_list[:8])}
 """
 
+    collector = _collector.get()
+    if collector is not None:
+        return collector.defer(llm, prompt, fallback)
+
     try:
         response = llm.invoke(prompt)
         text = (response.content or "").strip()
@@ -0,0 +1,35 @@
+"""Standalone job worker: ``JOB_BACKEND=redis python -m app.worker``.
+
+Runs only the job worker pool, so workers scale separately from the API
+processes (set ``JOB_WORKERS=0`` on the API to keep it from draining jobs).
+"""
+
+import asyncio
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.controllers.job_controller import JOB_BACKEND, JobWorkerPool
+from app.db.redis_cache import close_async_redis
+from app.graph.registry import warm_graphs
+from app.utils.http import close_async_client
+
+
+async def main():
+    if JOB_BACKEND == "memory":
+        raise SystemExit("The in-memory job backend cannot be shared with a separate worker; use JOB_BACKEND=redis.")
+
+    warm_graphs()
+    pool = JobWorkerPool()
+    pool.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await pool.stop()
+        await close_async_client()
+        await close_async_redis()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+"""Wall-clock latency of the case-1 graph against stubbed upstreams.
+
+Run from ``backend/``::
+
+    python -m benchmarks.graph_latency --runs 5 --delay-ms 200
+
+Every upstream call sleeps for ``--delay-ms`` instead of hitting the network,
+so the numbers isolate orchestration cost: the sequential chain pays for every
+agent one after another while the DAG only pays for its critical path.
+
+``--llm fake`` runs the agents' LLM branches against the local stand-in model
+(``FAKE_LLM_LATENCY_MS`` / ``FAKE_LLM_TOKENS_PER_SECOND`` set its speed) with
+the completion cache off; the default ``none`` measures the fallback branches.
+"""
+
+import argparse
+import statistics
+import time
+from unittest import mock
+
+from langgraph.graph import END, START, StateGraph
+
+from app.graph.langgraph_builder import Case1State, build_case1_graph
+from app.graph.nodes.clinical_node import clinical_node
+from app.graph.nodes.market_node import market_node
+from app.graph.nodes.patent_node import patent_node
+from app.graph.nodes.research_node import research_node
+from app.graph.nodes.scoring_node import final_verdict_node, scoring_node
+
+MOLECULE = "benchmarkumab"
+
+
+def build_sequential_graph():
+    """The pre-DAG topology: research -> clinical -> patent -> market -> ..."""
+    graph = StateGraph(Case1State)
+    chain = [
+        ("research", research_node),
+        ("clinical", clinical_node),
+        ("patent", patent_node),
+        ("market", market_node),
+        ("scoring", scoring_node),
+        ("final_verdict", final_verdict_node),
+    ]
+    for name, node in chain:
+        graph.add_node(name, node)
+    graph.add_edge(START, chain[0][0])
+    for (current, _), (following, _) in zip(chain, chain[1:]):
+        graph.add_edge(current, following)
+    graph.add_edge(chain[-1][0], END)
+    return graph.compile()
+
+
+def stubbed_upstreams(delay_s: float, llm: str = "none"):
+    def slow(result):
+        def _call(*args, **kwargs):
+            time.sleep(delay_s)
+            return result
+        return _call
+
+    def slow_stream(*args, **kwargs):
+        # The research agent closes its article stream, so hand it a generator.
+        time.sleep(delay_s)
+        yield from ()
+
+    return [
+        mock.patch("app.agents.research_agent.iter_articles", slow_stream),
+        mock.patch("app.agents.clinical_agent.iter_trials", slow([])),
+        mock.patch("app.agents.patent_agent.fetch_patents", slow([])),
+        mock.patch.dict("os.environ", {"GROQ_API_KEY": ""}),
+        mock.patch("app.core.llm_provider.LLM_PROVIDER", "fake" if llm == "fake" else "groq"),
+        mock.patch("app.core.llm_provider.LLM_CACHE_ENABLED", False),
+        mock.patch("app.core.llm_provider._cached_llm", None),
+    ]
+
+
+def measure(graph, runs: int) -> list[float]:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        graph.invoke({"molecule": MOLECULE, "disease": None, "trend_mode": False})
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--delay-ms", type=float, default=200)
+    parser.add_argument("--llm", choices=["none", "fake"], default="none")
+    args = parser.parse_args()
+
+    patches = stubbed_upstreams(args.delay_ms / 1000, args.llm)
+    for patch in patches:
+        patch.start()
+    try:
+        for label, graph in (
+            ("sequential", build_sequential_graph()),
+            ("dag", build_case1_graph()),
+        ):
+            timings = measure(graph, args.runs)
+            print(
+                f"{label:<10} median={statistics.median(timings):8.1f} ms "
+                f"min={min(timings):8.1f} ms max={max(timings):8.1f} ms"
+            )
+    finally:
+        for patch in reversed(patches):
+            patch.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Per-request orchestration overhead: rebuild-per-request vs the graph registry.
+
+Run from ``backend/``::
+
+    python -m benchmarks.graph_overhead --runs 200
+
+Upstreams are stubbed with zero delay so the timings are dominated by graph
+construction/compilation and LangGraph's own scheduling.
+"""
+
+import argparse
+import statistics
+import time
+
+from app.graph.langgraph_builder import build_case1_graph
+from app.graph.registry import get_graph
+from benchmarks.graph_latency import MOLECULE, stubbed_upstreams
+
+CASE_TYPE = "CASE_1_MOLECULE_ONLY"
+
+
+def rebuild_per_request():
+    return build_case1_graph()
+
+
+def registry_lookup():
+    return get_graph(CASE_TYPE)
+
+
+def measure(resolve_graph, runs: int) -> list[float]:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        graph = resolve_graph()
+        graph.invoke({"molecule": MOLECULE, "disease": None, "trend_mode": False})
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    patches = stubbed_upstreams(0)
+    for patch in patches:
+        patch.start()
+    try:
+        get_graph(CASE_TYPE)
+        for label, resolve_graph in (
+            ("rebuild", rebuild_per_request),
+            ("registry", registry_lookup),
+        ):
+            timings = measure(resolve_graph, args.runs)
+            print(
+                f"{label:<10} median={statistics.median(timings):7.2f} ms "
+                f"p95={statistics.quantiles(timings, n=20)[-1]:7.2f} ms"
+            )
+    finally:
+        for patch in reversed(patches):
+            patch.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Records/second of PatentsView paging against a local fixture server.
+
+Run from ``backend/``::
+
+    python -m benchmarks.patent_paging --total 5000 --page-size 500 --latency-ms 150
+
+A threaded HTTP server on localhost answers PatentsView-shaped queries for
+``--total`` synthetic patents (with a slice of duplicates) after sleeping
+``--latency-ms`` per page, so the run compares fetching pages one at a time
+against the concurrent pager in ``app/services/patent_service.py``.
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+from app.db import redis_cache
+from app.services import patent_service
+from app.utils.http import close_async_client
+
+MOLECULE = "benchmarkumab"
+
+
+def make_handler(total: int, latency_s: float):
+    class FixtureHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            query = parse_qs(urlsplit(self.path).query)
+            options = json.loads(query["o"][0])
+            page, per_page = options["page"], options["per_page"]
+            start = (page - 1) * per_page
+            patents = [
+                {
+                    # Every 20th record repeats its predecessor's number.
+                    "patent_number": str(10_000_000 + index - (index % 20 == 19)),
+                    "patent_title": f"Formulations of {MOLECULE} for indication {index}",
+                    "patent_date": f"{2000 + index % 25}-01-01",
+                    "assignees": [{"assignee_organization": f"Assignee {index % 50}"}]
+                }
+                for index in range(start, min(start + per_page, total))
+            ]
+            body = json.dumps({
+                "patents": patents,
+                "count": len(patents),
+                "total_patent_count": total
+            }).encode()
+
+            time.sleep(latency_s)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return FixtureHandler
+
+
+def measure(label: str, fetch):
+    started = time.perf_counter()
+    count = fetch()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<12} records={count:>6} time={elapsed:6.2f} s rate={count / elapsed:9.0f}/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--total", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=patent_service.PAGE_CONCURRENCY)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.total, args.latency_ms / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/patents/query"
+
+    def sync_fetch(concurrency: int):
+        return lambda: sum(1 for _ in patent_service.iter_patents(
+            MOLECULE, args.total, args.page_size, concurrency
+        ))
+
+    async def async_fetch():
+        try:
+            return len([
+                patent async for patent in patent_service.aiter_patents(
+                    MOLECULE, args.total, args.page_size, args.concurrency
+                )
+            ])
+        finally:
+            await close_async_client()
+
+    try:
+        # Every run must page against the fixture server, not Redis or the
+        # in-process cache tier filled by the previous run.
+        with mock.patch.object(patent_service, "API_URL", url), \
+                mock.patch.object(redis_cache, "UPSTREAM_CACHE_ENABLED", False):
+            measure("sequential", sync_fetch(1))
+            measure("concurrent", sync_fetch(args.concurrency))
+            measure("async", lambda: asyncio.run(async_fetch()))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Peak memory and throughput of PubMed efetch parsing: whole tree vs streaming.
+
+Run from ``backend/``::
+
+    python -m benchmarks.pubmed_parse --articles 20000
+    python -m benchmarks.pubmed_parse --fixture recorded_efetch.xml.gz
+
+Without ``--fixture`` a synthetic PubmedArticleSet shaped like a recorded
+efetch response is generated in a temporary file. Gzipped fixtures are read
+as a stream so neither variant gets the decompressed file for free.
+"""
+
+import argparse
+import gzip
+import os
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+from app.utils.parser import _article_record, iter_pubmed_articles
+
+CHUNK_SIZE = 64 * 1024
+
+ARTICLE_TEMPLATE = """<PubmedArticle><MedlineCitation Status="MEDLINE" Owner="NLM">
+<PMID Version="1">{pmid}</PMID><Article PubModel="Print"><Journal><ISSN IssnType="Electronic">1234-5678</ISSN>
+<JournalIssue CitedMedium="Internet"><Volume>12</Volume><Issue>3</Issue><PubDate><Year>{year}</Year><Month>Jan</Month></PubDate></JournalIssue>
+<Title>Journal of Translational Repurposing</Title></Journal>
+<ArticleTitle>Candidate {pmid} improves outcomes in obesity and cardiovascular disease cohorts</ArticleTitle>
+<Abstract>{abstract}</Abstract>
+<AuthorList CompleteYN="Y">{authors}</AuthorList><Language>eng</Language></Article></MedlineCitation>
+<PubmedData><ArticleIdList><ArticleId IdType="pubmed">{pmid}</ArticleId></ArticleIdList></PubmedData></PubmedArticle>
+"""
+
+
+def write_fixture(path: str, articles: int):
+    abstract = "".join(
+        f'<AbstractText Label="SECTION {i}">{"Randomized evidence sentence. " * 12}</AbstractText>'
+        for i in range(4)
+    )
+    authors = "".join(
+        f"<Author><LastName>Author{i}</LastName><ForeName>F</ForeName></Author>"
+        for i in range(8)
+    )
+    with gzip.open(path, "wt", encoding="utf-8") as handle:
+        handle.write('<?xml version="1.0" ?>\n<PubmedArticleSet>\n')
+        for pmid in range(10_000_000, 10_000_000 + articles):
+            handle.write(ARTICLE_TEMPLATE.format(
+                pmid=pmid, year=2000 + pmid % 25, abstract=abstract, authors=authors
+            ))
+        handle.write("</PubmedArticleSet>\n")
+
+
+def read_chunks(path: str):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as handle:
+        while chunk := handle.read(CHUNK_SIZE):
+            yield chunk
+
+
+def parse_tree(path: str) -> int:
+    """The pre-streaming approach: buffer the body, then ET.fromstring it."""
+    root = ET.fromstring(b"".join(read_chunks(path)))
+    records = [_article_record(entry) for entry in root.iter("PubmedArticle")]
+    return sum(1 for record in records if record)
+
+
+def parse_stream(path: str) -> int:
+    return sum(1 for _ in iter_pubmed_articles(read_chunks(path)))
+
+
+def measure(label: str, parse, path: str):
+    tracemalloc.start()
+    started = time.perf_counter()
+    count = parse(path)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:<8} articles={count:>7} time={elapsed:7.2f} s "
+        f"rate={count / elapsed:9.0f}/s peak={peak / 2**20:8.1f} MiB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--fixture", help="Recorded efetch XML (optionally .gz)")
+    args = parser.parse_args()
+
+    path = args.fixture
+    if path is None:
+        handle, path = tempfile.mkstemp(suffix=".xml.gz")
+        os.close(handle)
+        write_fixture(path, args.articles)
+    try:
+        measure("tree", parse_tree, path)
+        measure("stream", parse_stream, path)
+    finally:
+        if args.fixture is None:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core import llm_provider
+from app.graph.budget import budget_input, within_budget
+from app.utils.cancellation import NodeCancelled
+from app.utils.http import http_get
+
+
+def run_node(work, budget_ms=50):
+    """Run ``work`` in a worker thread under a node budget; return the node's update."""
+    state = budget_input(budget_ms)
+    return asyncio.run(within_budget(
+        state,
+        "patent",
+        "patents",
+        lambda: asyncio.to_thread(work),
+        lambda: {"source": "fallback"}
+    ))
+
+
+def test_abandoned_thread_stops_before_its_next_upstream_call():
+    outcome = {}
+    finished = threading.Event()
+
+    def slow_agent():
+        time.sleep(0.2)
+        try:
+            # Never reached: the node gave up before this request.
+            http_get("http://127.0.0.1:9/unreachable")
+            outcome["requested"] = True
+        except NodeCancelled:
+            outcome["cancelled"] = True
+        finally:
+            finished.set()
+
+    update = run_node(slow_agent)
+
+    assert update == {"patents": {"source": "fallback"}, "degraded_nodes": ["patent"]}
+    assert finished.wait(2)
+    assert outcome == {"cancelled": True}
+
+
+def test_abandoned_thread_gets_no_llm(monkeypatch):
+    monkeypatch.setattr(llm_provider, "LLM_PROVIDER", "fake")
+    monkeypatch.setattr(llm_provider, "_cached_llm", None)
+    seen = []
+    finished = threading.Event()
+
+    def slow_agent():
+        seen.append(llm_provider.get_llm() is not None)
+        time.sleep(0.2)
+        seen.append(llm_provider.get_llm() is not None)
+        finished.set()
+
+    run_node(slow_agent)
+
+    assert finished.wait(2)
+    assert seen == [True, False]
+
+
+def test_llm_client_taken_before_the_deadline_is_refused_after(monkeypatch):
+    monkeypatch.setattr(llm_provider, "LLM_PROVIDER", "fake")
+    monkeypatch.setattr(llm_provider, "_cached_llm", None)
+    monkeypatch.setattr(llm_provider, "LLM_CACHE_ENABLED", False)
+    outcome = []
+    finished = threading.Event()
+
+    def slow_agent():
+        llm = llm_provider.get_llm()
+        time.sleep(0.2)
+        try:
+            llm.invoke("Summarize the findings for metformin.")
+            outcome.append("called")
+        except NodeCancelled:
+            outcome.append("cancelled")
+        finally:
+            finished.set()
+
+    run_node(slow_agent)
+
+    assert finished.wait(2)
+    assert outcome == ["cancelled"]
+
+
+def test_unbudgeted_work_is_unaffected():
+    assert run_node(lambda: {"source": "api"}, budget_ms=None) == {"patents": {"source": "api"}}
@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+import pytest
+
+from app.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, guarded
+
+RESET_SECONDS = 0.05
+
+
+@pytest.fixture
+def breaker():
+    return CircuitBreaker("test", failure_threshold=2, reset_seconds=RESET_SECONDS)
+
+
+def fail(breaker, exc=RuntimeError("upstream down"), is_failure=lambda exc: True):
+    with pytest.raises(type(exc)):
+        with guarded(breaker, is_failure):
+            raise exc
+
+
+def succeed(breaker):
+    with guarded(breaker):
+        pass
+
+
+def half_open(breaker):
+    fail(breaker)
+    fail(breaker)
+    time.sleep(RESET_SECONDS)
+    assert breaker.state == HALF_OPEN
+
+
+def test_opens_after_consecutive_failures(breaker):
+    fail(breaker)
+    assert breaker.state == CLOSED
+    fail(breaker)
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError):
+        succeed(breaker)
+    assert breaker.snapshot() == {"state": OPEN, "consecutive_failures": 2, "rejected_calls": 1}
+
+
+def test_success_resets_the_failure_count(breaker):
+    fail(breaker)
+    succeed(breaker)
+    fail(breaker)
+
+    assert breaker.state == CLOSED
+
+
+def test_non_failures_count_as_success(breaker):
+    not_found = LookupError("404")
+    for _ in range(3):
+        fail(breaker, not_found, is_failure=lambda exc: False)
+
+    assert breaker.state == CLOSED
+
+
+def test_half_open_lets_one_trial_through(breaker):
+    half_open(breaker)
+
+    with guarded(breaker):
+        assert breaker.is_open()
+        # A second caller is rejected while the trial is in flight.
+        with pytest.raises(CircuitOpenError):
+            succeed(breaker)
+
+    assert breaker.state == CLOSED
+    assert not breaker.is_open()
+
+
+def test_failed_trial_reopens(breaker):
+    half_open(breaker)
+    fail(breaker)
+
+    assert breaker.state == OPEN
+
+
+def test_cancelled_trial_frees_the_slot_without_deciding(breaker):
+    half_open(breaker)
+
+    async def cancelled_trial():
+        with guarded(breaker):
+            await asyncio.sleep(1)
+
+    async def scenario():
+        trial = asyncio.ensure_future(cancelled_trial())
+        await asyncio.sleep(0)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+    asyncio.run(scenario())
+
+    assert breaker.state == HALF_OPEN
+    assert not breaker.is_open()
+    succeed(breaker)
+    assert breaker.state == CLOSED
+
+
+def test_cancellation_while_closed_is_not_a_failure(breaker):
+    fail(breaker)
+    with pytest.raises(KeyboardInterrupt):
+        with guarded(breaker):
+            raise KeyboardInterrupt
+
+    fail(breaker, RuntimeError("still down"))
+    assert breaker.state == OPEN
+    assert breaker.snapshot()["consecutive_failures"] == 2
@@ -0,0 +1,165 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from app.agents import clinical_agent
+from app.agents.clinical_agent import ClinicalAgent
+from app.db import redis_cache
+from app.services import clinicaltrials_service
+from app.services.clinicaltrials_service import _label, afetch_trials, fetch_trials, iter_trials
+from app.utils.http import close_async_client
+
+PAGES = json.loads((Path(__file__).parent / "fixtures" / "clinicaltrials_v2_pages.json").read_text())
+
+
+class StandIn:
+    """Local v2 /studies stand-in: serves ``pages`` in order, following ``pageToken``."""
+
+    def __init__(self, page_for):
+        self.page_for = page_for
+        self.requests: list[dict] = []
+
+    def __enter__(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                params = {key: values[0] for key, values in parse_qs(urlsplit(self.path).query).items()}
+                stand_in.requests.append(params)
+                body = json.dumps(stand_in.page_for(params)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}/api/v2/studies"
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def recorded_page(params: dict) -> dict:
+    token = params.get("pageToken")
+    index = int(token.split("-")[1]) - 1 if token else 0
+    return PAGES[index]
+
+
+def endless_page(params: dict) -> dict:
+    """Full pages of unique studies with a next token every time."""
+    page = int(params.get("pageToken", "0"))
+    size = int(params["pageSize"])
+    template = PAGES[0]["studies"][0]
+    studies = []
+    for offset in range(size):
+        study = json.loads(json.dumps(template))
+        study["protocolSection"]["identificationModule"]["nctId"] = f"NCT9{page * size + offset:07d}"
+        studies.append(study)
+    return {"studies": studies, "nextPageToken": str(page + 1)}
+
+
+@pytest.fixture(autouse=True)
+def no_cache(monkeypatch):
+    monkeypatch.setattr(redis_cache, "UPSTREAM_CACHE_ENABLED", False)
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    with StandIn(recorded_page) as stand_in:
+        monkeypatch.setattr(clinicaltrials_service, "API_URL", stand_in.url)
+        yield stand_in
+
+
+@pytest.mark.parametrize("value, label", [
+    ("COMPLETED", "Completed"),
+    ("ACTIVE_NOT_RECRUITING", "Active not recruiting"),
+    ("NOT_YET_RECRUITING", "Not yet recruiting"),
+    ("PHASE2", "Phase 2"),
+    ("EARLY_PHASE1", "Early phase 1"),
+    ("NA", "NA"),
+    (None, None),
+])
+def test_label_turns_v2_enums_into_readable_labels(value, label):
+    assert _label(value) == label
+
+
+def test_follows_next_page_token_across_pages(recorded):
+    trials = fetch_trials("metformin", limit=50)
+
+    assert [trial["NCTId"] for trial in trials] == [f"NCT0000000{index}" for index in range(1, 6)]
+    assert [request.get("pageToken") for request in recorded.requests] == [None, "page-2", "page-3"]
+    assert {request["query.term"] for request in recorded.requests} == {"metformin"}
+    assert recorded.requests[0]["fields"] == ",".join(clinicaltrials_service.FIELDS)
+
+
+def test_flattens_studies_into_studyfields_records(recorded):
+    first = fetch_trials("metformin", "obesity", limit=1)[0]
+
+    assert recorded.requests[0]["query.term"] == "metformin obesity"
+    assert first == {
+        "NCTId": "NCT00000001",
+        "BriefTitle": "Metformin in Obesity",
+        "OfficialTitle": "A Study of Metformin in Obesity",
+        "Condition": ["Obesity"],
+        "Phase": ["Phase 3"],
+        "OverallStatus": "Completed",
+        "BriefSummary": "This study evaluates metformin in obesity.",
+        "EnrollmentCount": 420,
+        "StartDate": "2015-03",
+        "LocationCountry": ["United States"],
+        "LeadSponsorName": "Acme Pharma"
+    }
+
+
+def test_limit_stops_paging_early(recorded):
+    trials = list(iter_trials("metformin", limit=3, page_size=2))
+
+    assert len(trials) == 3
+    assert [request["pageSize"] for request in recorded.requests] == ["2", "1"]
+
+
+def test_async_paging_matches_sync(recorded):
+    async def fetch():
+        try:
+            return await afetch_trials("metformin", limit=50)
+        finally:
+            await close_async_client()
+
+    assert asyncio.run(fetch()) == fetch_trials("metformin", limit=50)
+
+
+def test_agent_stops_at_max_api_trials(monkeypatch):
+    with StandIn(endless_page) as stand_in:
+        monkeypatch.setattr(clinicaltrials_service, "API_URL", stand_in.url)
+        payload = ClinicalAgent().run({"molecule": "benchmarkumab", "disease": None})
+
+    assert payload["metrics"]["total_trials"] == clinical_agent.MAX_API_TRIALS
+    assert [request["pageSize"] for request in stand_in.requests] == [str(clinical_agent.MAX_API_TRIALS)]
+
+
+def test_agent_classifies_statuses_from_v2_labels(recorded, monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "")
+    payload = ClinicalAgent().run({"molecule": "benchmarkumab", "disease": None})
+
+    def ids(trials):
+        return sorted(trial["nct_id"] for trial in trials)
+
+    assert ids(payload["successful_trials"]) == ["NCT00000001", "NCT00000002"]
+    assert ids(payload["failed_trials"]) == ["NCT00000003", "NCT00000005"]
+    assert ids(payload["inconclusive_trials"]) == ["NCT00000004"]
+    assert payload["registry_entries"][0]["phase"] == "Phase 3"
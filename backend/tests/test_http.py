@@ -0,0 +1,115 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app.utils import cassettes, http, latency, rate_limit
+
+URL = "https://api.example.org/v1/search"
+ENDPOINT = latency.endpoint_of(URL)
+
+
+@pytest.fixture(autouse=True)
+def fresh_windows(monkeypatch):
+    monkeypatch.setattr(latency, "_windows", {})
+
+
+def test_timeouts_are_recorded_as_censored_samples(monkeypatch):
+    monkeypatch.setattr(latency, "HTTP_LATENCY_MIN_SAMPLES", 3)
+    for _ in range(3):
+        latency.record_latency(ENDPOINT, 0.1)
+
+    async def slow():
+        raise httpx.ReadTimeout("read timed out")
+
+    timeout = latency.timeout_for(ENDPOINT, 10)
+    with pytest.raises(httpx.ReadTimeout):
+        asyncio.run(http._timed(ENDPOINT, timeout, slow))
+
+    # The p99 moved up to the timeout, so the next timeout is longer.
+    assert latency.timeout_for(ENDPOINT, 10) > timeout
+    assert latency.latency_metrics()[ENDPOINT]["timeouts"] == 1
+
+
+def test_pool_timeouts_are_not_latency_samples():
+    async def queued():
+        raise httpx.PoolTimeout("no free connection")
+
+    with pytest.raises(httpx.PoolTimeout):
+        asyncio.run(http._timed(ENDPOINT, 1.0, queued))
+
+    assert ENDPOINT not in latency.latency_metrics()
+
+
+def hedged(monkeypatch, responses, delay=0.01):
+    """Run ``_hedged`` where the n-th send answers ``responses[n]`` after its delay."""
+    sends = []
+
+    async def send():
+        status, seconds = responses[len(sends)]
+        sends.append(status)
+        await asyncio.sleep(seconds)
+        return httpx.Response(status, request=httpx.Request("GET", URL))
+
+    monkeypatch.setattr(http, "hedge_delay", lambda endpoint: delay)
+    return asyncio.run(http._hedged(URL, 1.0, send)), sends
+
+
+def test_hedge_waits_past_a_fast_server_error(monkeypatch):
+    response, sends = hedged(monkeypatch, [(200, 0.1), (503, 0.0)])
+
+    assert response.status_code == 200
+    assert sends == [200, 503]
+
+
+def test_hedge_returns_the_original_when_both_fail(monkeypatch):
+    response, _ = hedged(monkeypatch, [(502, 0.05), (503, 0.0)])
+
+    assert response.status_code == 502
+
+
+@pytest.fixture
+def stand_in(monkeypatch):
+    paths = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            paths.append(self.path)
+            body = json.dumps({"ok": True}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(cassettes, "UPSTREAM_MODE", "replay")
+    monkeypatch.setattr(cassettes, "REPLAY_URL", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(rate_limit, "_wait_stats", {})
+    yield paths
+    server.shutdown()
+    server.server_close()
+
+
+def test_replay_keeps_limits_and_latency_on_the_real_upstream(stand_in):
+    upstream = "https://api.patentsview.org/patents/query"
+
+    async def fetch():
+        try:
+            return await http.async_get_json(upstream, params={"q": "x"})
+        finally:
+            await http.close_async_client()
+
+    assert http.get_json(upstream, params={"q": "x"}) == {"ok": True}
+    assert asyncio.run(fetch()) == {"ok": True}
+
+    assert stand_in == ["/api.patentsview.org/patents/query?q=x"] * 2
+    assert list(latency.latency_metrics()) == ["api.patentsview.org/patents/query"]
+    assert rate_limit.rate_limit_metrics()["api.patentsview.org"]["requests"] == 2
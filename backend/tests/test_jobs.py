@@ -0,0 +1,153 @@
+import asyncio
+
+import fakeredis
+import pytest
+from fastapi.testclient import TestClient
+
+from app.controllers import job_controller
+from app.controllers.job_controller import (
+    ANALYSIS,
+    BATCH,
+    COMPLETED,
+    FAILED,
+    InMemoryJobBackend,
+    JobWorkerPool,
+    RedisJobBackend,
+)
+
+CASE = "CASE_1_MOLECULE_ONLY"
+PROBE = {"molecule": "aspirin", "disease": None, "trend_mode": False}
+STATE = {"research": {"summary": "ok"}, "degraded_nodes": []}
+
+
+async def fake_stream_analysis(case_type, case_probe, budget_ms=None):
+    yield "research", STATE["research"]
+    yield None, {**case_probe, **STATE}
+
+
+async def fake_run_batch(analyses, concurrency):
+    for position, _ in enumerate(analyses):
+        yield [position], {**analyses[position][1], **STATE}, None
+
+
+@pytest.fixture(autouse=True)
+def stub_graph(monkeypatch):
+    monkeypatch.setattr(job_controller, "stream_analysis", fake_stream_analysis)
+    monkeypatch.setattr(job_controller, "run_batch", fake_run_batch)
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request, monkeypatch):
+    if request.param == "memory":
+        backend = InMemoryJobBackend()
+    else:
+        client = fakeredis.FakeAsyncRedis()
+        monkeypatch.setattr(job_controller, "get_async_redis", lambda: client)
+        backend = RedisJobBackend()
+    monkeypatch.setattr(job_controller, "_backend", backend)
+    return backend
+
+
+async def wait_for_status(backend, job_id, statuses=(COMPLETED, FAILED), timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        job = await backend.get(job_id)
+        if job and job["status"] in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+async def run_with_pool(backend, scenario):
+    pool = JobWorkerPool(backend, workers=1, poll_timeout=0.05)
+    pool.start()
+    try:
+        return await scenario()
+    finally:
+        await pool.stop()
+
+
+def test_analysis_job_is_queued_then_completed(backend):
+    async def scenario():
+        job = await job_controller.submit_job(ANALYSIS, [(CASE, PROBE, None, 0)])
+        assert job["status"] == "queued"
+        return await wait_for_status(backend, job["id"])
+
+    job = asyncio.run(run_with_pool(backend, scenario))
+
+    assert job["status"] == COMPLETED
+    assert job["completed"] == 1
+    assert job["nodes"]["research"] == {"summary": "ok"}
+    assert job["result"]["agents"]["research"] == {"summary": "ok"}
+
+
+def test_batch_job_reports_rejected_and_completed_items(backend):
+    rejected = [{"index": 1, "status": "error", "detail": "bad item"}]
+
+    async def scenario():
+        job = await job_controller.submit_job(BATCH, [(CASE, PROBE, None, 0)], rejected)
+        return await wait_for_status(backend, job["id"])
+
+    job = asyncio.run(run_with_pool(backend, scenario))
+
+    assert job["status"] == COMPLETED
+    assert job["total"] == job["completed"] == 2
+    assert sorted(line["index"] for line in job["results"]) == [0, 1]
+    assert {line["status"] for line in job["results"]} == {"ok", "error"}
+
+
+class FlakyBackend(InMemoryJobBackend):
+    """Fails the first write that marks a job running, like a Redis blip mid-job."""
+
+    def __init__(self):
+        super().__init__()
+        self.failures = 1
+
+    async def save(self, job):
+        if job["status"] == "running" and self.failures:
+            self.failures -= 1
+            raise ConnectionError("backend unavailable")
+        await super().save(job)
+
+
+def test_worker_survives_backend_error(monkeypatch):
+    backend = FlakyBackend()
+    monkeypatch.setattr(job_controller, "_backend", backend)
+
+    async def scenario():
+        first = await job_controller.submit_job(ANALYSIS, [(CASE, PROBE, None, 0)])
+        second = await job_controller.submit_job(ANALYSIS, [(CASE, PROBE, None, 0)])
+        return (
+            await wait_for_status(backend, first["id"]),
+            await wait_for_status(backend, second["id"])
+        )
+
+    first, second = asyncio.run(run_with_pool(backend, scenario))
+
+    assert first["status"] == FAILED
+    assert first["finished_at"] is not None
+    assert second["status"] == COMPLETED
+
+
+def test_jobs_api_submit_and_poll(monkeypatch):
+    backend = InMemoryJobBackend()
+    monkeypatch.setattr(job_controller, "_backend", backend)
+    monkeypatch.setattr(job_controller, "JOB_WORKERS", 1)
+    monkeypatch.setattr("app.main.warm_graphs", lambda: None)
+
+    from app.main import app
+
+    with TestClient(app) as client:
+        created = client.post("/jobs", json=[{"molecule": "aspirin"}, {"molecule": "aspirin", "budget_ms": 0}])
+        assert created.status_code == 202
+        job_id = created.json()["job_id"]
+
+        for _ in range(500):
+            job = client.get(f"/jobs/{job_id}").json()
+            if job["status"] == COMPLETED:
+                break
+        assert job["status"] == COMPLETED
+        assert [line["status"] for line in sorted(job["results"], key=lambda line: line["index"])] == ["ok", "error"]
+        assert "analyses" not in job
+
+        assert client.get("/jobs/unknown").status_code == 404
@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import fakeredis
+import pytest
+
+from app.core import llm_provider
+from app.core.fake_llm import FakeChatModel
+from app.core.llm_provider import CachedLLM, llm_cache_bypassed
+from app.db import redis_cache
+
+PROMPT = "You are a market analyst.\nMolecule: metformin"
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    monkeypatch.setattr(redis_cache, "get_redis", lambda client=fakeredis.FakeRedis(): client)
+    monkeypatch.setattr(redis_cache, "LOCAL_CACHE_MAX_BYTES", 0)
+    monkeypatch.setattr(llm_provider, "LLM_CACHE_ENABLED", True)
+    return CachedLLM(FakeChatModel(latency_ms=0, tokens_per_second=0))
+
+
+def cached(response) -> bool:
+    return bool(response.response_metadata.get("cached"))
+
+
+def test_repeat_prompt_is_served_from_cache(llm):
+    first = llm.invoke(PROMPT)
+    second = llm.invoke(PROMPT)
+
+    assert not cached(first) and cached(second)
+    assert second.content == first.content
+
+
+def test_bypass_skips_the_read_but_still_stores(llm):
+    with llm_cache_bypassed():
+        assert not cached(llm.invoke(PROMPT))
+        assert not cached(llm.invoke(PROMPT))
+    assert cached(llm.invoke(PROMPT))
+
+
+def test_call_arguments_are_part_of_the_key(llm):
+    llm.invoke(PROMPT)
+
+    assert not cached(llm.invoke(PROMPT, stop=["\n"]))
+    # Config carries callbacks and run metadata only.
+    assert cached(llm.invoke(PROMPT, {"tags": ["research"]}))
+    assert llm.cache_key(PROMPT) != llm.cache_key(PROMPT, stop=["\n"])
+
+
+def test_unexpected_positional_arguments_are_rejected(llm):
+    with pytest.raises(TypeError):
+        llm.invoke(PROMPT, None, ["\n"])
+
+
+def test_unknown_provider_fails_at_import():
+    env = {**os.environ, "LLM_PROVIDER": "openai"}
+    result = subprocess.run(
+        [sys.executable, "-c", "import app.core.llm_provider"],
+        cwd=Path(__file__).resolve().parents[1], env=env, capture_output=True, text=True
+    )
+
+    assert result.returncode != 0
+    assert "Unknown LLM_PROVIDER 'openai'; expected one of groq, fake" in result.stderr
@@ -0,0 +1,68 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from app.utils import rate_limit
+from app.utils.circuit_breaker import get_breaker
+
+HOST = "api.patentsview.org"
+URL = f"https://{HOST}/patents/query"
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setitem(rate_limit.UPSTREAM_RATES, HOST, (10.0, 1))
+    limiter = rate_limit.InMemoryRateLimiter()
+    monkeypatch.setattr(rate_limit, "_limiter", limiter)
+    return limiter
+
+
+def test_cancelled_waiter_returns_its_token(limiter):
+    async def scenario():
+        assert await rate_limit.aacquire(URL) == 0
+        waiter = asyncio.create_task(rate_limit.aacquire(URL))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        # Only the first request's token is spent, so the next one waits a single slot.
+        return limiter.reserve(HOST, 10.0, 1)
+
+    assert asyncio.run(scenario()) == pytest.approx(0.1, abs=0.02)
+
+
+def test_redis_limiter_registers_each_script_once(monkeypatch):
+    client = fakeredis.FakeRedis()
+    registered = []
+    register_script = client.register_script
+    monkeypatch.setattr(client, "register_script", lambda source: registered.append(source) or register_script(source))
+    monkeypatch.setattr(rate_limit, "get_redis", lambda: client)
+    limiter = rate_limit.RedisRateLimiter()
+
+    delays = [limiter.reserve(HOST, 10.0, 2) for _ in range(3)]
+    limiter.refund(HOST, 10.0, 2)
+
+    assert delays[:2] == [0, 0] and delays[2] > 0
+    assert registered == [rate_limit.RESERVE_SCRIPT, rate_limit.REFUND_SCRIPT]
+    assert limiter.reserve(HOST, 10.0, 2) == pytest.approx(delays[2], abs=0.02)
+
+
+def test_redis_limiter_falls_back_behind_the_redis_breaker(monkeypatch):
+    breaker = get_breaker("redis")
+    calls = []
+
+    def unreachable():
+        calls.append(1)
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(rate_limit, "get_redis", unreachable)
+    monkeypatch.setattr(breaker, "failure_threshold", 1)
+    limiter = rate_limit.RedisRateLimiter()
+    try:
+        assert limiter.reserve(HOST, 10.0, 2) == 0
+        assert limiter.reserve(HOST, 10.0, 2) == 0
+        # The breaker opened after the first failure, so Redis was not tried again.
+        assert calls == [1]
+    finally:
+        breaker.record_success()
@@ -0,0 +1,45 @@
+import pytest
+
+from app.agents import research_agent
+from app.agents.research_agent import MAX_NEGATIVE, MAX_POSITIVE, MAX_PUBMED_ARTICLES, ResearchAgent
+
+
+def article(pmid: int, negative: bool = False) -> dict:
+    abstract = "Metformin did not improve outcomes in obesity." if negative else "Metformin reduced weight in obesity."
+    return {"pmid": str(pmid), "title": f"Metformin trial {pmid}", "abstract": abstract, "journal": "J", "year": "2020"}
+
+
+@pytest.fixture
+def scan(monkeypatch):
+    scanned = []
+
+    def run(articles):
+        def iter_articles(molecule, max_results, page_size):
+            assert max_results == page_size == MAX_PUBMED_ARTICLES
+            for item in articles[:max_results]:
+                scanned.append(item["pmid"])
+                yield item
+
+        monkeypatch.setattr(research_agent, "iter_articles", iter_articles)
+        monkeypatch.setenv("GROQ_API_KEY", "")
+        return ResearchAgent().run({"molecule": "benchmarkumab"}), scanned
+
+    return run
+
+
+def test_scan_keeps_looking_for_negatives_after_positive_quota(scan):
+    articles = [article(pmid) for pmid in range(10)] + [article(pmid, negative=True) for pmid in range(10, 20)]
+
+    payload, scanned = scan(articles)
+
+    assert len(payload["negative_evidence"]) == MAX_NEGATIVE
+    assert len(payload["positive_evidence"]) >= MAX_POSITIVE
+    # Stops as soon as both quotas are met.
+    assert scanned[-1] == str(10 + MAX_NEGATIVE - 1)
+
+
+def test_scan_is_bounded_when_quotas_are_never_met(scan):
+    payload, scanned = scan([article(pmid) for pmid in range(MAX_PUBMED_ARTICLES * 3)])
+
+    assert len(scanned) == MAX_PUBMED_ARTICLES
+    assert payload["negative_evidence"] == []
@@ -0,0 +1,130 @@
+import asyncio
+import time
+
+import fakeredis
+import pytest
+
+from app.controllers import repurpose_controller
+from app.core import llm_provider
+from app.db import redis_cache
+
+CASE_TYPE = "CASE_1_MOLECULE_ONLY"
+PROBE = {"molecule": "metformin", "disease": None, "trend_mode": False}
+STATE = {"research": {"summary": "cached"}, "degraded_nodes": []}
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    client = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(redis_cache, "get_async_redis", lambda: client)
+    monkeypatch.setattr(redis_cache, "LOCAL_CACHE_MAX_BYTES", 0)
+    monkeypatch.setattr(repurpose_controller, "RESPONSE_CACHE_ENABLED", True)
+    return client
+
+
+@pytest.fixture
+def runs(monkeypatch):
+    calls = []
+
+    async def run_analysis(case_type, case_probe, budget_ms=None, no_cache=False):
+        calls.append(budget_ms)
+        return {**STATE, "budget_ms": budget_ms, "llm_usage": {"calls": 0}}, False
+
+    monkeypatch.setattr(repurpose_controller, "run_analysis", run_analysis)
+    return calls
+
+
+async def store(age_seconds: float):
+    key = repurpose_controller.response_cache_key(CASE_TYPE, PROBE)
+    entry = {"state": STATE, "computed_at": time.time() - age_seconds, "generated_at": "2026-01-01T00:00:00Z"}
+    await redis_cache.acache_store("responses", key, entry, 3600)
+    return key
+
+
+async def drain_refreshes():
+    while repurpose_controller._refreshes:
+        await asyncio.gather(*repurpose_controller._refreshes, return_exceptions=True)
+
+
+def test_cache_hit_reports_the_requested_budget(redis_client, runs):
+    async def scenario():
+        await store(age_seconds=0)
+        return await repurpose_controller.cached_analysis(CASE_TYPE, PROBE, budget_ms=1500)
+
+    state, provenance = asyncio.run(scenario())
+
+    assert provenance["cache"] == "fresh"
+    assert state["budget_ms"] == 1500
+    assert runs == []
+
+
+def test_stale_refresh_releases_its_claim(redis_client, runs):
+    stale = repurpose_controller.RESPONSE_CACHE_FRESH_SECONDS + 1
+
+    async def scenario():
+        key = await store(age_seconds=stale)
+        _, provenance = await repurpose_controller.cached_analysis(CASE_TYPE, PROBE)
+        await drain_refreshes()
+        claimed = await redis_client.exists(f"{key}:refresh")
+
+        # The refreshed entry is fresh; age it again and the next hit refreshes again.
+        await store(age_seconds=stale)
+        await repurpose_controller.cached_analysis(CASE_TYPE, PROBE)
+        await drain_refreshes()
+        return provenance, claimed
+
+    provenance, claimed = asyncio.run(scenario())
+
+    assert provenance["cache"] == "stale"
+    assert not claimed
+    assert runs == [None, None]
+
+
+def test_failed_refresh_releases_its_claim(redis_client, monkeypatch):
+    async def failing_run(case_type, case_probe, budget_ms=None, no_cache=False):
+        raise RuntimeError("graph failed")
+
+    monkeypatch.setattr(repurpose_controller, "run_analysis", failing_run)
+
+    async def scenario():
+        key = await store(age_seconds=repurpose_controller.RESPONSE_CACHE_FRESH_SECONDS + 1)
+        await repurpose_controller.cached_analysis(CASE_TYPE, PROBE)
+        await drain_refreshes()
+        return await redis_client.exists(f"{key}:refresh")
+
+    assert not asyncio.run(scenario())
+
+
+def test_no_cache_recomputes_and_stores(redis_client, runs):
+    async def scenario():
+        await store(age_seconds=0)
+        fresh_run = await repurpose_controller.cached_analysis(CASE_TYPE, PROBE, no_cache=True)
+        return fresh_run, await repurpose_controller.cached_analysis(CASE_TYPE, PROBE)
+
+    (state, provenance), (_, next_provenance) = asyncio.run(scenario())
+
+    assert provenance == {"coalesced": False}
+    assert state["llm_usage"] == {"calls": 0}
+    assert runs == [None]
+    assert next_provenance["cache"] == "fresh"
+
+
+def test_no_cache_runs_bypass_the_llm_cache(monkeypatch):
+    class Graph:
+        async def ainvoke(self, graph_input):
+            return {"bypassed": llm_provider._llm_cache_bypassed.get()}
+
+    monkeypatch.setattr(repurpose_controller, "get_graph", lambda case_type: Graph())
+
+    async def scenario():
+        return await asyncio.gather(
+            repurpose_controller.run_analysis(CASE_TYPE, PROBE),
+            repurpose_controller.run_analysis(CASE_TYPE, PROBE, no_cache=True)
+        )
+
+    (cached_run, shared), (fresh_run, fresh_shared) = asyncio.run(scenario())
+
+    # A no_cache request never joins a run that may read cached completions.
+    assert not shared and not fresh_shared
+    assert cached_run["bypassed"] is False
+    assert fresh_run["bypassed"] is True
@@ -0,0 +1,194 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.controllers import repurpose_controller
+from app.controllers.repurpose_controller import SingleFlight, run_batch
+
+
+class Work:
+    """A run that counts how often it started and waits until released."""
+
+    def __init__(self, result="state"):
+        self.result = result
+        self.started = 0
+        self.cancelled = 0
+        self.release = None
+
+    async def __call__(self):
+        self.started += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def test_followers_share_the_leaders_run():
+    work = Work()
+
+    async def scenario():
+        flight = SingleFlight()
+        work.release = asyncio.Event()
+        callers = [asyncio.ensure_future(flight.do("metformin", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        work.release.set()
+        return await asyncio.gather(*callers)
+
+    results = asyncio.run(scenario())
+
+    assert work.started == 1
+    assert results == [("state", False), ("state", True), ("state", True)]
+
+
+def test_followers_share_the_leaders_error():
+    work = Work(result=RuntimeError("graph failed"))
+
+    async def scenario():
+        flight = SingleFlight()
+        work.release = asyncio.Event()
+        callers = [asyncio.ensure_future(flight.do("metformin", work)) for _ in range(2)]
+        await asyncio.sleep(0)
+        work.release.set()
+        return await asyncio.gather(*callers, return_exceptions=True)
+
+    errors = asyncio.run(scenario())
+
+    assert work.started == 1
+    assert [str(error) for error in errors] == ["graph failed", "graph failed"]
+
+
+def test_different_keys_run_separately():
+    work = Work()
+
+    async def scenario():
+        flight = SingleFlight()
+        work.release = asyncio.Event()
+        work.release.set()
+        return await asyncio.gather(flight.do("metformin", work), flight.do("aspirin", work))
+
+    assert asyncio.run(scenario()) == [("state", False), ("state", False)]
+    assert work.started == 2
+
+
+def test_finished_runs_are_not_reused():
+    work = Work()
+
+    async def scenario():
+        flight = SingleFlight()
+        work.release = asyncio.Event()
+        work.release.set()
+        first = await flight.do("metformin", work)
+        return first, await flight.do("metformin", work)
+
+    assert asyncio.run(scenario()) == (("state", False), ("state", False))
+    assert work.started == 2
+
+
+def test_run_survives_while_a_follower_still_waits():
+    work = Work()
+
+    async def scenario():
+        flight = SingleFlight()
+        work.release = asyncio.Event()
+        leader = asyncio.ensure_future(flight.do("metformin", work))
+        follower = asyncio.ensure_future(flight.do("metformin", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        work.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == ("state", True)
+    assert (work.started, work.cancelled) == (1, 0)
+
+
+def test_run_is_cancelled_once_the_last_waiter_leaves():
+    work = Work()
+
+    async def scenario():
+        flight = SingleFlight()
+        work.release = asyncio.Event()
+        callers = [asyncio.ensure_future(flight.do("metformin", work)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+        cancelled = work.cancelled
+
+        # The abandoned run is forgotten, so the next caller starts afresh.
+        work.release.set()
+        return cancelled, await flight.do("metformin", work)
+
+    cancelled, result = asyncio.run(scenario())
+
+    assert cancelled == 1
+    assert result == ("state", False)
+    assert work.started == 2
+
+
+@pytest.fixture
+def graph_runs(monkeypatch):
+    runs = []
+
+    async def run_analysis(case_type, case_probe, budget_ms=None, no_cache=False):
+        runs.append(case_probe["molecule"])
+        if case_probe["molecule"] == "failumab":
+            raise RuntimeError("graph failed")
+        return {"research": {"molecule": case_probe["molecule"]}}, False
+
+    monkeypatch.setattr(repurpose_controller, "run_analysis", run_analysis)
+    return runs
+
+
+def probe(molecule: str) -> dict:
+    return {"molecule": molecule, "disease": None, "trend_mode": False}
+
+
+def test_batch_runs_showcase_aliases_once(graph_runs):
+    analyses = [
+        ("CASE_1_MOLECULE_ONLY", probe("Aspirin"), None),
+        ("CASE_1_MOLECULE_ONLY", probe("metformin"), None),
+        ("CASE_1_MOLECULE_ONLY", probe("acetylsalicylic acid"), None),
+        ("CASE_1_MOLECULE_ONLY", probe("failumab"), None),
+    ]
+
+    async def collect():
+        return [item async for item in run_batch(analyses, concurrency=2)]
+
+    results = {tuple(positions): (state, error) for positions, state, error in asyncio.run(collect())}
+
+    assert sorted(graph_runs) == ["Aspirin", "failumab", "metformin"]
+    assert set(results) == {(0, 2), (1,), (3,)}
+    assert results[(0, 2)][0] == {"research": {"molecule": "Aspirin"}}
+    assert isinstance(results[(3,)][1], RuntimeError)
+
+
+def test_batch_route_reports_errors_per_line(graph_runs):
+    from app.main import app
+
+    items = [
+        {"molecule": "aspirin"},
+        {"drug": "acetylsalicylic acid"},
+        {"molecule": "metformin", "budget_ms": -1},
+        {"molecule": "metformin", "colour": "blue"},
+        {"disease": "obesity"},
+        {"molecule": "failumab"},
+    ]
+    response = TestClient(app).post("/repurpose/batch", json=items)
+    lines = {line["index"]: line for line in map(json.loads, response.text.splitlines())}
+
+    assert response.status_code == 200
+    assert sorted(lines) == list(range(len(items)))
+    assert [lines[index]["status"] for index in range(len(items))] == ["ok", "ok", "error", "error", "error", "error"]
+    assert lines[0]["result"]["agents"] == lines[1]["result"]["agents"]
+    assert lines[5]["detail"] == repurpose_controller.GRAPH_FAILURE_DETAIL
+    assert graph_runs.count("aspirin") == 1
@@ -0,0 +1,36 @@
+import asyncio
+
+from app.controllers import repurpose_controller
+from app.core.llm_usage import current_usage
+
+CASE_TYPE = "CASE_1_MOLECULE_ONLY"
+PROBE = {"molecule": "metformin", "disease": None, "trend_mode": False}
+
+
+class MeteredGraph:
+    """Graph stand-in whose nodes record one LLM call each in the request's usage."""
+
+    async def astream(self, graph_input, stream_mode):
+        state = dict(graph_input)
+        for node in ("research", "final_verdict"):
+            current_usage().record("fake-llm", 100, 20, 5.0)
+            state[node] = {"summary": node}
+            yield "updates", {node: {node: state[node]}}
+            yield "values", dict(state)
+
+
+def test_stream_reports_llm_usage(monkeypatch):
+    monkeypatch.setattr(repurpose_controller, "get_graph", lambda case_type: MeteredGraph())
+
+    async def collect():
+        return [item async for item in repurpose_controller.stream_analysis(CASE_TYPE, PROBE)]
+
+    events = asyncio.run(collect())
+    node, state = events[-1]
+
+    assert [name for name, _ in events[:-1]] == ["research", "final_verdict"]
+    assert node is None
+    assert state["llm_usage"]["calls"] == 2
+    assert state["llm_usage"]["total_tokens"] == 240
+    response = repurpose_controller.build_response(CASE_TYPE, PROBE, state)
+    assert response["query_metadata"]["llm_usage"]["calls"] == 2
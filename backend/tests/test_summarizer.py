@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+from langchain_core.messages import AIMessage
+
+from app.controllers import repurpose_controller
+from app.core.llm_usage import llm_caller
+from app.graph.budget import budget_input
+from app.utils.summarizer import SummaryCollector, _collector
+
+
+class SlowLLM:
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    async def ainvoke(self, prompt):
+        await asyncio.sleep(self.seconds)
+        return AIMessage(content=f"summary of {prompt}")
+
+
+def test_resolve_reports_nodes_whose_summaries_missed_the_deadline():
+    async def scenario():
+        collector = SummaryCollector(asyncio.get_running_loop())
+        with llm_caller("research"):
+            fast = await asyncio.to_thread(collector.defer, SlowLLM(0), "fast", "offline fast")
+        with llm_caller("clinical"):
+            slow = await asyncio.to_thread(collector.defer, SlowLLM(5), "slow", "offline slow")
+        value = await collector.resolve({"research": fast, "clinical": slow}, timeout=0.1)
+        return value, collector.timed_out_nodes
+
+    value, timed_out = asyncio.run(scenario())
+
+    assert value == {"research": "summary of fast", "clinical": "offline slow"}
+    assert timed_out == ["clinical"]
+
+
+def test_run_with_a_late_summary_is_degraded_and_not_cached(monkeypatch):
+    class Graph:
+        async def ainvoke(self, graph_input):
+            def agent():
+                with llm_caller("market"):
+                    return _collector.get().defer(SlowLLM(5), "market", "offline market")
+            return {**graph_input, "market": {"summary": await asyncio.to_thread(agent)}}
+
+    stored = []
+
+    async def acache_store(service, key, entry, ttl):
+        stored.append(entry)
+
+    monkeypatch.setattr(repurpose_controller, "acache_store", acache_store)
+
+    async def scenario():
+        state = await repurpose_controller._invoke_graph(Graph(), {"molecule": "metformin", **budget_input(100)})
+        await repurpose_controller._store_response("response:test", state)
+        return state
+
+    started = time.monotonic()
+    state = asyncio.run(scenario())
+
+    assert time.monotonic() - started < 1
+    assert state["market"] == {"summary": "offline market"}
+    assert state["degraded_nodes"] == ["market"]
+    assert stored == []